@@ -0,0 +1,174 @@
+# aggregates.py
+"""
+Agregat historis yang dimaterialisasi sekali saat load / ingest:
+- rollup mingguan & bulanan per (pasar, komoditas): rata-rata, min, max, harga terakhir,
+  jumlah hari tercatat, plus perubahan YoY untuk bulanan,
+- rolling harian: rata-rata 7 & 30 hari dan volatilitas (std perubahan % harian, 30 hari).
+
+Semua deret dihitung sekaligus di atas frame lebar [hari x (pasar, komoditas)]
+(satu pivot, lalu resample / rolling vektor), bukan loop per deret.
+Data hari baru cukup di-update lewat update_rollups, yang hanya menghitung ulang
+periode yang tersentuh.
+
+Dipakai di app.py dengan:
+    from aggregates import compute_rollups, pair_rollup, latest_volatility
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+ROLLING_WINDOWS = (7, 30)
+VOLATILITY_WINDOW = 30
+WEEK_FREQ = "W-MON"   # minggu dilabeli dengan hari Senin awal minggu
+MONTH_FREQ = "MS"
+
+
+def _to_wide(df: pd.DataFrame) -> pd.DataFrame:
+    """Pivot data panjang -> [tanggal x (pasar, komoditas)] di kalender harian kontinu."""
+    wide = df.pivot_table(
+        index="tanggal",
+        columns=["pasar", "komoditas"],
+        values="harga",
+        aggfunc="last",
+        observed=True,
+    ).astype("float64")
+    calendar = pd.date_range(wide.index.min(), wide.index.max(), freq="D", name="tanggal")
+    return wide.reindex(calendar)
+
+
+def _stack(wide_by_stat: dict, index_name: str) -> pd.DataFrame:
+    """{stat: frame lebar} -> frame panjang [index_name, pasar, komoditas, stat...]."""
+    long = pd.concat(
+        {stat: w.stack(["pasar", "komoditas"], future_stack=True) for stat, w in wide_by_stat.items()},
+        axis=1,
+    )
+    long.index = long.index.set_names([index_name, "pasar", "komoditas"])
+    return long.reset_index()
+
+
+def _period_rollup(daily: pd.DataFrame, freq: str) -> dict:
+    closed = "left" if freq.startswith("W") else None
+    label = "left" if freq.startswith("W") else None
+    r = daily.resample(freq, closed=closed, label=label)
+    return {
+        "mean": r.mean(),
+        "min": r.min(),
+        "max": r.max(),
+        "last": r.last(),
+        "n_obs": r.count(),
+    }
+
+
+def _compute(daily: pd.DataFrame, since: Optional[pd.Timestamp] = None) -> dict:
+    """
+    Hitung semua agregat dari frame lebar harian. Jika `since` diberikan, hasil
+    hanya berisi periode yang memuat / sesudah tanggal itu (dipakai update_rollups);
+    daily diharapkan sudah menyertakan data lookback yang cukup.
+    """
+    weekly = _period_rollup(daily, WEEK_FREQ)
+    monthly = _period_rollup(daily, MONTH_FREQ)
+    # resample menghasilkan bulan yang kontinu, jadi 12 baris = 12 bulan
+    monthly["yoy_pct"] = monthly["mean"].pct_change(12, fill_method=None) * 100.0
+
+    # Rolling di atas deret ffill supaya hari libur tidak memutus jendela
+    filled = daily.ffill()
+    observed = daily.notna()
+    rolling = {f"ma{w}": filled.rolling(w, min_periods=1).mean() for w in ROLLING_WINDOWS}
+    pct = filled.pct_change(fill_method=None) * 100.0
+    rolling[f"volatility{VOLATILITY_WINDOW}"] = pct.rolling(
+        VOLATILITY_WINDOW, min_periods=2
+    ).std()
+    rolling["is_gap"] = ~observed
+
+    out = {
+        "weekly": _stack(weekly, "periode"),
+        "monthly": _stack(monthly, "periode"),
+        "rolling": _stack(rolling, "tanggal"),
+    }
+    # Buang baris tanpa observasi sama sekali (sebelum deret mulai)
+    out["weekly"] = out["weekly"][out["weekly"]["n_obs"] > 0]
+    out["monthly"] = out["monthly"][out["monthly"]["n_obs"] > 0]
+    out["rolling"] = out["rolling"][out["rolling"][f"ma{ROLLING_WINDOWS[0]}"].notna()]
+
+    if since is not None:
+        out["weekly"] = out["weekly"][out["weekly"]["periode"] >= _week_start(since)]
+        out["monthly"] = out["monthly"][out["monthly"]["periode"] >= _month_start(since)]
+        out["rolling"] = out["rolling"][out["rolling"]["tanggal"] >= since]
+
+    for name in ("weekly", "monthly"):
+        out[name] = out[name].astype({"n_obs": "int32"})
+    return {k: v.reset_index(drop=True) for k, v in out.items()}
+
+
+def _week_start(ts: pd.Timestamp) -> pd.Timestamp:
+    ts = pd.Timestamp(ts).normalize()
+    return ts - pd.Timedelta(days=ts.weekday())
+
+
+def _month_start(ts: pd.Timestamp) -> pd.Timestamp:
+    return pd.Timestamp(ts).normalize().replace(day=1)
+
+
+def compute_rollups(df: pd.DataFrame) -> dict:
+    """
+    Materialisasi semua agregat dari data panjang (output prepare_price_dataframe).
+
+    Return dict:
+        daily   : frame lebar harian (dipakai untuk update inkremental)
+        weekly  : [periode, pasar, komoditas, mean, min, max, last, n_obs]
+        monthly : idem + yoy_pct
+        rolling : [tanggal, pasar, komoditas, ma7, ma30, volatility30, is_gap]
+    """
+    daily = _to_wide(df)
+    rollups = _compute(daily)
+    rollups["daily"] = daily
+    return rollups
+
+
+def update_rollups(rollups: dict, df_new: pd.DataFrame) -> dict:
+    """
+    Tambahkan hari-hari baru (data panjang) ke agregat yang sudah ada.
+    Hanya minggu / bulan / jendela rolling yang tersentuh data baru yang dihitung ulang.
+    """
+    if df_new is None or df_new.empty:
+        return rollups
+
+    new_wide = _to_wide(df_new)
+    daily = new_wide.combine_first(rollups["daily"])  # data baru menang (koreksi)
+    daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq="D", name="tanggal"))
+
+    since = new_wide.index.min()
+    # Lookback: 12 bulan untuk YoY, jendela rolling terpanjang untuk MA / volatilitas
+    lookback_start = min(
+        _month_start(since) - pd.DateOffset(months=12),
+        since - pd.Timedelta(days=max(max(ROLLING_WINDOWS), VOLATILITY_WINDOW)),
+        _week_start(since),
+    )
+    fresh = _compute(daily.loc[lookback_start:], since=since)
+
+    updated = {"daily": daily}
+    for name, key in (("weekly", "periode"), ("monthly", "periode"), ("rolling", "tanggal")):
+        cutoff = fresh[name][key].min() if not fresh[name].empty else since
+        old = rollups[name]
+        updated[name] = pd.concat([old[old[key] < cutoff], fresh[name]], ignore_index=True)
+    return updated
+
+
+def pair_rollup(rollups: dict, name: str, pasar: str, komoditas: str) -> pd.DataFrame:
+    """Ambil satu agregat ('weekly' / 'monthly' / 'rolling') untuk satu (pasar, komoditas)."""
+    frame = rollups[name]
+    mask = (frame["pasar"] == pasar) & (frame["komoditas"] == komoditas)
+    return frame[mask].drop(columns=["pasar", "komoditas"])
+
+
+def latest_volatility(rollups: dict, pasar: str, komoditas: str) -> Optional[float]:
+    """Volatilitas historis terakhir (std perubahan % harian, VOLATILITY_WINDOW hari)."""
+    col = f"volatility{VOLATILITY_WINDOW}"
+    series = pair_rollup(rollups, "rolling", pasar, komoditas)[col].dropna()
+    if series.empty:
+        return None
+    value = float(series.iloc[-1])
+    return value if np.isfinite(value) else None
@@ -1,19 +1,58 @@
+import os
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
-import base64
-from pathlib import Path
 
+from aggregates import compute_rollups, pair_rollup, latest_volatility
+from assets_pipeline import header_background_css
+from charts import build_overlay_figure, build_scenario_figure
+from data_quality import split_quarantine
+from drift_monitor import ingest_actuals, record_forecast
+from market_compare import compare_markets, pairs_for
+from models_lstm import artifact_fill
 from utils import prepare_price_dataframe, kebijakan_saran
-from models_lstm import load_artifacts, forecast_lstm
+from model_store import open_model_store
+from prewarm import ForecastWarmer
+from price_cube import get_price_cube
+from scenarios import scenario_summary, simulate_price_shocks
+
+# Copy-on-write: slice/filter tidak menggandakan data sampai benar-benar diubah
+pd.set_option("mode.copy_on_write", True)
 
+DATA_PATH = "harga_pasar_2024_2025.csv"
 ARTIFACT_WINDOW_SIZE = 30
+# float32 / float16 / int8 (lihat quantize_artifacts.py). Jika model store sudah di-export,
+# model dari store selalu float32 (bobot asli, forward pass NumPy); presisi ini hanya
+# berlaku untuk pasangan yang tidak ada / basi di store.
+ARTIFACT_PRECISION = "float16"
 FORECAST_DAYS_DEFAULT = 30
+FORECAST_DAYS_MAX = 60
+
+@st.cache_resource(max_entries=1)
+def get_warmer(data_version: float):
+    # Thread pool per proses: load model + forecast horizon maksimum di background.
+    # Jika store bobot bersama sudah di-export (python model_store.py export),
+    # semua worker memakai bobot memory-mapped yang sama, bukan salinan .keras masing-masing.
+    store = open_model_store()
+    store_load = None
+    if store is not None and store.window_size == ARTIFACT_WINDOW_SIZE:
+        store_load = lambda p, k: store.load_artifacts(p, k, precision=ARTIFACT_PRECISION)
+    warmer = ForecastWarmer(
+        series_fn=lambda p, k: load_cube(data_version).series_frame(p, k),
+        window_size=ARTIFACT_WINDOW_SIZE,
+        precision=ARTIFACT_PRECISION,
+        horizon=FORECAST_DAYS_MAX,
+        load_fn=store_load,
+    )
+    # Server start (dan setiap versi data baru): panaskan pasar default selectbox halaman
+    cube = load_cube(data_version)
+    if cube.pasar:
+        warmer.warm_market(cube.pasar[0], cube.komoditas_for(cube.pasar[0]))
+    return warmer
 
-@st.cache_resource
 def get_artifacts(pasar: str, komoditas: str):
-    return load_artifacts(pasar, komoditas, ARTIFACT_WINDOW_SIZE)
+    return get_warmer(DATA_VERSION).artifacts(pasar, komoditas)
 
 
 # -------------------------
@@ -73,29 +112,19 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
-# FUNGSI + HEADER DENGAN FOTO
-def get_base64_of_image(image_path: str) -> str:
-    """
-    Mengubah file gambar lokal menjadi string base64
-    agar bisa dipakai di CSS background-image.
-    """
-    img_path = Path(image_path)
-    if not img_path.exists():
-        return ""
-    with open(img_path, "rb") as f:
-        data = f.read()
-    return base64.b64encode(data).decode("utf-8")
 # === Header dengan background foto ===
-img_b64 = get_base64_of_image("assets/background_header.jpeg")
+# Foto disajikan sebagai file statis ter-cache (lihat assets_pipeline.py);
+# CSS dihitung sekali per proses dan hanya berisi URL, bukan foto base64.
+header_bg_css = header_background_css(bool(st.get_option("server.enableStaticServing")))
 
-if img_b64:
+if header_bg_css:
     st.markdown(
         f"""
         <style>
         .header-banner {{
             width: 100%;
             height: 280px;
-            background-image: url("data:image/jpeg;base64,{img_b64}");
+            {header_bg_css}
             background-size: cover;
             background-position: center -300px;   /* ⇦ GESER FOTO KE ATAS */
             background-repeat: no-repeat;
@@ -137,15 +166,47 @@ st.markdown("---")
 # Load Data (tanpa upload, langsung dari file lokal)
 # -------------------------
 
-@st.cache_data
-def load_data():
-    df_raw = pd.read_csv("harga_pasar_2024_2025.csv")
-    return prepare_price_dataframe(df_raw)
+def current_data_version() -> float:
+    # mtime CSV = versi data; ikut jadi key semua cache di bawah, jadi saat CSV
+    # diperbarui frame, kubus, forecast, dan figure dibangun ulang tanpa restart server
+    return os.path.getmtime(DATA_PATH)
+
+# cache_resource (bukan cache_data): satu frame dipakai bersama semua sesi tanpa
+# salinan per rerun. Frame ini diperlakukan read-only.
+@st.cache_resource(max_entries=1)
+def load_data_checked(data_version: float):
+    # Titik anomali (salah ketik, lonjakan tak wajar) dikarantina saat ingest
+    df_raw = pd.read_csv(DATA_PATH)
+    df_clean, df_quarantine = split_quarantine(prepare_price_dataframe(df_raw))
+    try:
+        # Bandingkan forecast yang pernah dikeluarkan dengan harga aktual yang baru masuk
+        ingest_actuals(df_clean, ARTIFACT_WINDOW_SIZE)
+    except OSError as e:
+        print(f"[drift_monitor] Gagal memperbarui statistik error: {e}")
+    return df_clean, df_quarantine
+
+def load_data(data_version: float):
+    return load_data_checked(data_version)[0]
+
+def load_quarantine(data_version: float):
+    return load_data_checked(data_version)[1]
+
+@st.cache_resource(max_entries=1)
+def load_cube(data_version: float):
+    # Kubus [pasar x komoditas x hari] memory-mapped, dipakai bersama antar sesi/worker
+    return get_price_cube(load_data(data_version), DATA_PATH)
+
+@st.cache_resource(max_entries=1)
+def load_rollups(data_version: float):
+    # Rollup mingguan/bulanan + rolling mean & volatilitas semua deret, dihitung sekali
+    return compute_rollups(load_data(data_version))
 
 try:
-    df = load_data()
+    DATA_VERSION = current_data_version()
+    cube = load_cube(DATA_VERSION)
+    get_warmer(DATA_VERSION)  # mulai pre-warm pasar default sedini mungkin
 except Exception as e:
-    st.error(f"Gagal membaca dataset 'harga_pasar_2024_2025.csv': {e}")
+    st.error(f"Gagal membaca dataset '{DATA_PATH}': {e}")
     st.stop()
 
 def get_komoditas_style(nama: str):
@@ -187,39 +248,118 @@ def get_komoditas_style(nama: str):
 
 
 # -------------------------
-st.markdown("### 📊 Harga Komoditas Pasar + Prediksi (Model Tersimpan)")
+# DATA & FORECAST TER-CACHE (dipakai bersama oleh fragment di bawah)
+# -------------------------
+# Forecast dihitung sekali untuk horizon maksimum per (pasar, komoditas);
+# horizon yang lebih pendek = potongan awalnya (rollout autoregresif yang sama),
+# sehingga geser slider tidak memanggil model lagi.
+
+@st.cache_data(show_spinner=False)
+def get_series(pasar: str, komoditas: str, data_version: float) -> pd.DataFrame:
+    return load_cube(data_version).series_frame(pasar, komoditas)
+
+
+@st.cache_data(show_spinner="Menghitung prediksi...")
+def get_forecast_max(pasar: str, komoditas: str, data_version: float):
+    # Biasanya sudah dihitung di background oleh get_warmer().warm_market
+    df_pred = get_warmer(data_version).forecast(pasar, komoditas)
+    if df_pred is None:
+        return None
+    df_sub = get_series(pasar, komoditas, data_version)
+    try:
+        record_forecast(pasar, komoditas, df_pred, df_sub["tanggal"].max(), ARTIFACT_WINDOW_SIZE)
+    except OSError as e:
+        print(f"[drift_monitor] Gagal menyimpan forecast: {e}")
+    return df_pred
+
+
+def get_forecast(pasar: str, komoditas: str, n_days: int, data_version: float):
+    df_pred_max = get_forecast_max(pasar, komoditas, data_version)
+    if df_pred_max is None:
+        return None
+    return df_pred_max.head(n_days)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def get_overlay_figure(pasar: str, komoditas: str, forecast_days: int, data_version: float):
+    return build_overlay_figure(
+        get_series(pasar, komoditas, data_version),
+        get_forecast(pasar, komoditas, forecast_days, data_version),
+        komoditas,
+        pasar,
+        forecast_days,
+    )
 
-pasar_list = sorted(df["pasar"].unique().tolist())
-pasar = st.selectbox("Pilih Pasar", pasar_list, key="pilih_pasar")
 
-df_pasar = df[df["pasar"] == pasar].copy()
-if df_pasar.empty:
-    st.warning(f"Tidak ada data untuk pasar **{pasar}**.")
-    st.stop()
+@st.cache_data(show_spinner=False)
+def get_policy_text(pasar: str, komoditas: str, data_version: float) -> str:
+    # horizon analisis 7 hari <= horizon slider minimum, jadi teks tidak bergantung slider
+    return kebijakan_saran(
+        get_series(pasar, komoditas, data_version),
+        get_forecast(pasar, komoditas, 7, data_version),
+        horizon_analisis=7,
+        hist_volatility=latest_volatility(load_rollups(data_version), pasar, komoditas),
+    )
+
+
+@st.cache_data(show_spinner=False)
+def get_monthly_summary(pasar: str, komoditas: str, data_version: float) -> pd.DataFrame:
+    monthly = pair_rollup(load_rollups(data_version), "monthly", pasar, komoditas)
+    return pd.DataFrame({
+        "Bulan": monthly["periode"].dt.strftime("%m-%Y"),
+        "Rata-rata (Rp)": monthly["mean"].round(0),
+        "Min (Rp)": monthly["min"].round(0),
+        "Maks (Rp)": monthly["max"].round(0),
+        "YoY (%)": monthly["yoy_pct"].round(1),
+        "Hari tercatat": monthly["n_obs"],
+    }).iloc[::-1]
+
+
+@st.cache_data(show_spinner="Menjalankan simulasi...", max_entries=128)
+def get_scenarios(pasar: str, komoditas: str, shocks: tuple, n_days: int, data_version: float):
+    # Semua skenario dijalankan sebagai satu rollout batch (biaya ~ satu forecast)
+    loaded = get_artifacts(pasar, komoditas)
+    if loaded is None:
+        return None
+    return simulate_price_shocks(
+        loaded["model"],
+        loaded["scaler"],
+        get_series(pasar, komoditas, data_version),
+        shocks=[s / 100.0 for s in shocks],
+        n_days=n_days,
+        window_size=ARTIFACT_WINDOW_SIZE,
+        fill=artifact_fill(loaded["meta"]),
+    )
+
+
+@st.cache_data(show_spinner=False)
+def get_market_comparison(data_version: float) -> pd.DataFrame:
+    # Semua komoditas x pasangan pasar dihitung sekaligus, sekali per versi data
+    return compare_markets(load_cube(data_version))
 
-df_pasar["tanggal"] = pd.to_datetime(df_pasar["tanggal"])
-min_date = df_pasar["tanggal"].min().date()
-max_date = df_pasar["tanggal"].max().date()
 
 # =========================
 # CARD HARGA (ATAS) - WARNA TETAP
 # =========================
-st.markdown("#### 📅 Pilih Tanggal")
-
-selected_date = st.date_input(
-    "Tanggal harga yang ingin dilihat",
-    value=max_date,
-    min_value=min_date,
-    max_value=max_date,
-    key="tgl_pasar"
-)
+@st.fragment
+def cards_section(pasar: str, min_date, max_date):
+    """Ganti tanggal hanya me-rerun grid kartu ini."""
+    st.markdown("#### 📅 Pilih Tanggal")
+
+    selected_date = st.date_input(
+        "Tanggal harga yang ingin dilihat",
+        value=max_date,
+        min_value=min_date,
+        max_value=max_date,
+        key="tgl_pasar"
+    )
+
+    df_hari_ini = cube.day_frame(pasar, selected_date)  # sudah urut komoditas
 
-df_hari_ini = df_pasar[df_pasar["tanggal"].dt.date == selected_date].copy()
+    if df_hari_ini.empty:
+        st.warning(f"Tidak ada data pada tanggal **{selected_date}**.")
+        return
 
-if df_hari_ini.empty:
-    st.warning(f"Tidak ada data pada tanggal **{selected_date}**.")
-else:
-    df_hari_ini = df_hari_ini.sort_values("komoditas")
     st.markdown(f"#### 💰 Daftar Harga Komoditas – Pasar **{pasar}** ({selected_date})")
 
     num_cols = 3
@@ -261,187 +401,234 @@ else:
                 unsafe_allow_html=True
             )
 
-st.markdown("---")
 
-# DETAIL + PREDIKSI (BAWAH CARD, FULL WIDTH)
 # =========================
-st.markdown("### 🔍 Detail Per Komoditas + Prediksi")
-
-komoditas_list = sorted(df_pasar["komoditas"].unique().tolist())
-komoditas = st.selectbox(
-    "Pilih komoditas",
-    ["— Pilih komoditas —"] + komoditas_list,
-    index=0,
-    key="komoditas_detail"
-)
+# FORECAST (SLIDER + KPI + GRAFIK + TABEL)
+# =========================
+@st.fragment
+def forecast_section(pasar: str, komoditas: str, df_sub: pd.DataFrame):
+    """Geser slider hanya me-rerun bagian ini (tanpa kartu & saran kebijakan)."""
+    forecast_days = st.slider(
+        "Jumlah hari prediksi",
+        min_value=7,
+        max_value=FORECAST_DAYS_MAX,
+        value=FORECAST_DAYS_DEFAULT,
+        step=1
+    )
 
-if komoditas == "— Pilih komoditas —":
-    st.info("Pilih komoditas untuk melihat riwayat dan prediksi harganya.")
-    st.stop()
+    df_pred = get_forecast(pasar, komoditas, forecast_days, DATA_VERSION)
+
+    if df_pred is None or df_pred.empty:
+        st.warning("Prediksi tidak tersedia (cek artifacts / window size / data historis).")
+        return
+
+    # ✅ lanjut grafik / tabel di bawah ini
+    # ======= KPI RINGKAS =======
+    h = min(7, len(df_pred))
+    last_actual = float(df_sub["harga"].iloc[-1])
+    mean_pred_7 = float(df_pred["prediksi"].head(h).mean())
+    last_pred_7 = float(df_pred["prediksi"].iloc[h-1])
+
+    change_pct_mean = ((mean_pred_7 - last_actual) / last_actual * 100) if last_actual > 0 else 0.0
+    change_pct_last = ((last_pred_7 - last_actual) / last_actual * 100) if last_actual > 0 else 0.0
+
+    # skor tren: ambil yang lebih "tegas"
+    trend_score = change_pct_last if abs(change_pct_last) > abs(change_pct_mean) else change_pct_mean
+
+    # volatilitas
+    if len(df_pred) > 2:
+        pct_changes = df_pred["prediksi"].pct_change().dropna() * 100
+        volatility = float(pct_changes.std()) if not pct_changes.empty else 0.0
+    else:
+        volatility = 0.0
+
+    # BADGE TREND
+    if trend_score > 10:
+        tren_text, tren_class = "TREND: naik tajam", "badge-up"
+    elif trend_score > 3:
+        tren_text, tren_class = "TREND: naik ringan", "badge-up"
+    elif trend_score < -10:
+        tren_text, tren_class = "TREND: turun tajam", "badge-down"
+    elif trend_score < -3:
+        tren_text, tren_class = "TREND: turun ringan", "badge-down"
+    else:
+        tren_text, tren_class = "TREND: stabil", "badge-flat"
+
+    if volatility > 8:
+        vol_text = "VOL: tinggi"
+    elif volatility > 4:
+        vol_text = "VOL: sedang"
+    else:
+        vol_text = "VOL: rendah"
 
-forecast_days = st.slider(
-    "Jumlah hari prediksi",
-    min_value=7,
-    max_value=60,
-    value=FORECAST_DAYS_DEFAULT,
-    step=1
-)
+    st.markdown(
+        f'<span class="badge {tren_class}">{tren_text}</span>'
+        f'<span class="badge badge-vol">{vol_text}</span>',
+        unsafe_allow_html=True
+    )
 
-df_sub = df_pasar[df_pasar["komoditas"] == komoditas].copy().sort_values("tanggal")
-if df_sub.empty:
-    st.warning("Data historis kosong.")
-    st.stop()
+    # ✅ baru KPI metric di bawah badge
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Harga terakhir", f"Rp {last_actual:,.0f}")
+    c2.metric(f"Rata-rata prediksi {h} hari", f"Rp {mean_pred_7:,.0f}", f"{change_pct_mean:+.1f}%")
+    c3.metric(f"Prediksi hari ke-{h}", f"Rp {last_pred_7:,.0f}", f"{change_pct_last:+.1f}%")
+    c4.metric("Volatilitas prediksi", f"{volatility:.1f}%", "")
 
-st.caption(f"Periode: {df_sub['tanggal'].min().date()} s.d. {df_sub['tanggal'].max().date()}")
+    # ============ GRAFIK (RIWAYAT + PREDIKSI) ============
+    st.markdown("#### 📉 Riwayat + Prediksi Harga (Overlay)")
 
-loaded = get_artifacts(pasar, komoditas)
-if loaded is None:
-    st.warning(
-        f"Model untuk **{komoditas} – {pasar}** belum ada di folder `artifacts/` "
-        f"(WS={ARTIFACT_WINDOW_SIZE})."
+    fig = get_overlay_figure(pasar, komoditas, forecast_days, DATA_VERSION)
+
+    st.plotly_chart(fig, use_container_width=True)
+
+    # ============ PREDIKSI (RINGKAS + EXPANDER) ============
+    st.markdown("#### 📋 Prediksi (ringkas)")
+
+    df_pred_tampil = pd.DataFrame({
+        "Tanggal": df_pred["tanggal"].dt.strftime("%d-%m-%Y"),
+        "Prediksi (Rp)": df_pred["prediksi"].round(0).astype(int),
+    })
+
+    st.dataframe(df_pred_tampil.head(7), use_container_width=True, hide_index=True)
+
+    with st.expander("Lihat semua prediksi"):
+        st.dataframe(df_pred_tampil, use_container_width=True, hide_index=True)
+
+
+# ============ SARAN KEBIJAKAN ============
+@st.fragment
+def policy_section(pasar: str, komoditas: str):
+    """Teks saran hanya bergantung (pasar, komoditas), tidak ikut rerun saat slider digeser."""
+    st.markdown("#### 📑 Saran Kebijakan")
+    st.markdown(get_policy_text(pasar, komoditas, DATA_VERSION))
+
+
+# ============ SIMULASI WHAT-IF ============
+@st.fragment
+def scenario_section(pasar: str, komoditas: str):
+    """Grid kejutan harga besok; mengubah pilihan skenario hanya me-rerun bagian ini."""
+    with st.expander("🧪 Simulasi what-if: kejutan harga besok"):
+        shocks = st.multiselect(
+            "Perubahan harga besok (%)",
+            options=list(range(-50, 55, 5)),
+            default=[-20, -10, 10, 20],
+            format_func=lambda v: f"{v:+d}%",
+            key="skenario_shock",
+        )
+        if not shocks:
+            st.info("Pilih minimal satu skenario.")
+            return
+
+        df_scen = get_scenarios(pasar, komoditas, tuple(sorted(shocks)), FORECAST_DAYS_DEFAULT, DATA_VERSION)
+        if df_scen is None or df_scen.empty:
+            st.warning("Simulasi tidak tersedia untuk komoditas ini.")
+            return
+
+        st.plotly_chart(
+            build_scenario_figure(get_series(pasar, komoditas, DATA_VERSION), df_scen, komoditas, pasar),
+            use_container_width=True,
+        )
+        st.dataframe(scenario_summary(df_scen, horizon=7).round(1), use_container_width=True, hide_index=True)
+
+
+# ============ PERBANDINGAN ANTAR PASAR ============
+def market_compare_section(komoditas: str):
+    df_cmp = pairs_for(get_market_comparison(DATA_VERSION), komoditas)
+    if df_cmp.empty:
+        return
+
+    st.markdown("#### 🏪 Perbandingan Antar Pasar")
+    st.dataframe(
+        pd.DataFrame({
+            "Pasar A": df_cmp["pasar_a"],
+            "Pasar B": df_cmp["pasar_b"],
+            "Selisih terakhir (Rp)": df_cmp["spread_last"].round(0),
+            "Selisih terakhir (%)": df_cmp["spread_pct_last"].round(1),
+            "Rata-rata selisih (%)": df_cmp["spread_pct_mean"].round(1),
+            "Korelasi harian": df_cmp["corr_lag0"].round(2),
+            "Lag terkuat (hari)": df_cmp["best_lag"],
+            "Bergerak duluan": df_cmp["leader"],
+        }),
+        use_container_width=True,
+        hide_index=True,
     )
-    st.stop()
 
-model = loaded["model"]
-scaler = loaded["scaler"]
 
-mae = loaded.get("mae")
-rmse = loaded.get("rmse")
-if mae is not None and rmse is not None:
-    st.caption(f"📌 Evaluasi model: MAE={mae:.0f} | RMSE={rmse:.0f}")
+# DETAIL + PREDIKSI (BAWAH CARD, FULL WIDTH)
+# =========================
+@st.fragment
+def detail_section(pasar: str):
+    """Ganti komoditas me-rerun detail (forecast + saran) tanpa menyentuh grid kartu."""
+    st.markdown("### 🔍 Detail Per Komoditas + Prediksi")
+
+    komoditas_list = cube.komoditas_for(pasar)
+    komoditas = st.selectbox(
+        "Pilih komoditas",
+        ["— Pilih komoditas —"] + komoditas_list,
+        index=0,
+        key="komoditas_detail"
+    )
 
-df_pred = forecast_lstm(
-    model=model,
-    scaler=scaler,
-    df_sub=df_sub,
-    n_days=forecast_days,
-    window_size=ARTIFACT_WINDOW_SIZE
-)
+    if komoditas == "— Pilih komoditas —":
+        st.info("Pilih komoditas untuk melihat riwayat dan prediksi harganya.")
+        return
 
-if df_pred is None or df_pred.empty:
-    st.warning("Prediksi tidak tersedia (cek artifacts / window size / data historis).")
-    st.stop()
+    df_sub = get_series(pasar, komoditas, DATA_VERSION)
+    if df_sub.empty:
+        st.warning("Data historis kosong.")
+        return
 
-# ✅ lanjut grafik / tabel di bawah ini
-# ======= KPI RINGKAS =======
-h = min(7, len(df_pred))
-last_actual = float(df_sub["harga"].iloc[-1])
-mean_pred_7 = float(df_pred["prediksi"].head(h).mean())
-last_pred_7 = float(df_pred["prediksi"].iloc[h-1])
-
-change_pct_mean = ((mean_pred_7 - last_actual) / last_actual * 100) if last_actual > 0 else 0.0
-change_pct_last = ((last_pred_7 - last_actual) / last_actual * 100) if last_actual > 0 else 0.0
-
-# skor tren: ambil yang lebih "tegas"
-trend_score = change_pct_last if abs(change_pct_last) > abs(change_pct_mean) else change_pct_mean
-
-# volatilitas
-if len(df_pred) > 2:
-    pct_changes = df_pred["prediksi"].pct_change().dropna() * 100
-    volatility = float(pct_changes.std()) if not pct_changes.empty else 0.0
-else:
-    volatility = 0.0
-
-# BADGE TREND
-if trend_score > 10:
-    tren_text, tren_class = "TREND: naik tajam", "badge-up"
-elif trend_score > 3:
-    tren_text, tren_class = "TREND: naik ringan", "badge-up"
-elif trend_score < -10:
-    tren_text, tren_class = "TREND: turun tajam", "badge-down"
-elif trend_score < -3:
-    tren_text, tren_class = "TREND: turun ringan", "badge-down"
-else:
-    tren_text, tren_class = "TREND: stabil", "badge-flat"
-
-if volatility > 8:
-    vol_text = "VOL: tinggi"
-elif volatility > 4:
-    vol_text = "VOL: sedang"
-else:
-    vol_text = "VOL: rendah"
+    st.caption(f"Periode: {df_sub['tanggal'].min().date()} s.d. {df_sub['tanggal'].max().date()}")
 
-st.markdown(
-    f'<span class="badge {tren_class}">{tren_text}</span>'
-    f'<span class="badge badge-vol">{vol_text}</span>',
-    unsafe_allow_html=True
-)
+    with st.expander("Ringkasan historis bulanan"):
+        st.dataframe(get_monthly_summary(pasar, komoditas, DATA_VERSION), use_container_width=True, hide_index=True)
 
-# ✅ baru KPI metric di bawah badge
-c1, c2, c3, c4 = st.columns(4)
-c1.metric("Harga terakhir", f"Rp {last_actual:,.0f}")
-c2.metric(f"Rata-rata prediksi {h} hari", f"Rp {mean_pred_7:,.0f}", f"{change_pct_mean:+.1f}%")
-c3.metric(f"Prediksi hari ke-{h}", f"Rp {last_pred_7:,.0f}", f"{change_pct_last:+.1f}%")
-c4.metric("Volatilitas prediksi", f"{volatility:.1f}%", "")
-
-
-           # ============ GRAFIK (RIWAYAT + PREDIKSI) ============
-st.markdown("#### 📉 Riwayat + Prediksi Harga (Overlay)")
-
-df_sub_plot = df_sub.copy()
-df_sub_plot["tanggal"] = pd.to_datetime(df_sub_plot["tanggal"])
-
-df_pred_plot = df_pred.copy()
-df_pred_plot["tanggal"] = pd.to_datetime(df_pred_plot["tanggal"])
-
-last_actual_date = df_sub_plot["tanggal"].max()
-
-fig = go.Figure()
-
-fig.add_trace(go.Scatter(
-    x=df_sub_plot["tanggal"],
-    y=df_sub_plot["harga"],
-    mode="lines+markers",
-    name="Aktual",
-    hovertemplate="<b>%{x|%d-%m-%Y}</b><br>Aktual: <b>Rp %{y:,.0f}</b><extra></extra>",
-))
-
-fig.add_trace(go.Scatter(
-    x=df_pred_plot["tanggal"],
-    y=df_pred_plot["prediksi"],
-    mode="lines+markers",
-    name="Prediksi",
-    line=dict(dash="dash"),
-    hovertemplate="<b>%{x|%d-%m-%Y}</b><br>Prediksi: <b>Rp %{y:,.0f}</b><extra></extra>",
-))
-
-fig.add_shape(
-    type="line",
-    x0=last_actual_date,
-    x1=last_actual_date,
-    y0=0,
-    y1=1,
-    xref="x",
-    yref="paper",
-    line=dict(color="gray", width=2, dash="dot"),
-)
+    loaded = get_artifacts(pasar, komoditas)
+    if loaded is None:
+        st.warning(
+            f"Model untuk **{komoditas} – {pasar}** belum ada di folder `artifacts/` "
+            f"(WS={ARTIFACT_WINDOW_SIZE})."
+        )
+        return
 
-fig.update_layout(
-    title={"text": f"{komoditas} – Pasar {pasar} (Prediksi {forecast_days} hari)", "x": 0.5},
-    xaxis_title="Tanggal",
-    yaxis_title="Harga (Rp)",
-    template="plotly_white",
-    hovermode="x unified",
-    margin=dict(l=30, r=10, t=60, b=40),
-    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
-)
+    mae = loaded.get("mae")
+    rmse = loaded.get("rmse")
+    if mae is not None and rmse is not None:
+        st.caption(f"📌 Evaluasi model: MAE={mae:.0f} | RMSE={rmse:.0f}")
 
-st.plotly_chart(fig, use_container_width=True)
+    forecast_section(pasar, komoditas, df_sub)
+    policy_section(pasar, komoditas)
+    scenario_section(pasar, komoditas)
+    market_compare_section(komoditas)
 
-# ============ PREDIKSI (RINGKAS + EXPANDER) ============
-st.markdown("#### 📋 Prediksi (ringkas)")
 
-df_pred_tampil = df_pred.copy()
-df_pred_tampil["tanggal"] = pd.to_datetime(df_pred_tampil["tanggal"]).dt.strftime("%d-%m-%Y")
-df_pred_tampil["prediksi"] = df_pred_tampil["prediksi"].round(0).astype(int)
-df_pred_tampil = df_pred_tampil.rename(columns={"tanggal": "Tanggal", "prediksi": "Prediksi (Rp)"})
+# -------------------------
+# HALAMAN
+# -------------------------
+st.markdown("### 📊 Harga Komoditas Pasar + Prediksi (Model Tersimpan)")
 
-st.dataframe(df_pred_tampil.head(7), use_container_width=True, hide_index=True)
+df_karantina = load_quarantine(DATA_VERSION)
+if not df_karantina.empty:
+    with st.expander(f"⚠️ {len(df_karantina)} data harga dikarantina (tidak dipakai di grafik & prediksi)"):
+        st.dataframe(
+            df_karantina[["tanggal", "pasar", "komoditas", "harga", "alasan"]],
+            use_container_width=True,
+            hide_index=True,
+        )
 
-with st.expander("Lihat semua prediksi"):
-    st.dataframe(df_pred_tampil, use_container_width=True, hide_index=True)
+pasar_list = cube.pasar
+pasar = st.selectbox("Pilih Pasar", pasar_list, key="pilih_pasar")
 
-# ============ SARAN KEBIJAKAN ============
-st.markdown("#### 📑 Saran Kebijakan")
-st.markdown(kebijakan_saran(df_sub, df_pred, horizon_analisis=7))
+min_ts, max_ts = cube.date_bounds(pasar)
+if min_ts is None:
+    st.warning(f"Tidak ada data untuk pasar **{pasar}**.")
+    st.stop()
+
+# Mulai load model & forecast semua komoditas pasar ini selagi pengguna melihat kartu
+get_warmer(DATA_VERSION).warm_market(pasar, cube.komoditas_for(pasar))
+
+cards_section(pasar, min_ts.date(), max_ts.date())
+
+st.markdown("---")
 
+detail_section(pasar)
@@ -0,0 +1,125 @@
+# assets_pipeline.py
+"""
+Pipeline aset statis untuk banner header dashboard.
+
+Foto asli (assets/background_header.jpeg) diperkecil ke lebar tampilan dan
+dikompres ke WebP + JPEG di folder static/, lalu disajikan Streamlit sebagai
+file statis (server.enableStaticServing di .streamlit/config.toml).
+URL diberi ?v=<hash isi file> sehingga browser boleh meng-cache selamanya
+(Tornado memberi Cache-Control max-age panjang untuk URL ber-versi),
+dan CSS yang dikirim tiap rerun cukup berisi URL, bukan foto base64.
+
+Jika static serving tidak aktif / Pillow tidak tersedia, dipakai versi
+base64 dari varian terkecil yang dihitung sekali per proses.
+
+Jalankan manual (opsional, app.py juga membuatnya saat start):
+    python assets_pipeline.py
+"""
+
+import base64
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+
+HEADER_SOURCE = Path("assets/background_header.jpeg")
+STATIC_DIR = Path("static")
+STATIC_URL = "app/static"
+
+# Lebar tampilan banner (layout wide) + varian untuk layar kecil
+DISPLAY_WIDTHS = (1600, 800)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+
+def _variant_name(width: int, ext: str) -> str:
+    return f"{HEADER_SOURCE.stem}_{width}.{ext}"
+
+
+def _is_fresh(out_path: Path, source: Path) -> bool:
+    return out_path.exists() and out_path.stat().st_mtime >= source.stat().st_mtime
+
+
+def build_header_variants(source: Path = HEADER_SOURCE, out_dir: Path = STATIC_DIR,
+                          widths=DISPLAY_WIDTHS) -> dict:
+    """
+    Buat varian WebP & JPEG per lebar. Varian yang sudah lebih baru dari sumber dilewati.
+    Return dict {(width, ext): Path}; kosong jika sumber tidak ada.
+    """
+    if not source.exists():
+        return {}
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    targets = {
+        (w, ext): out_dir / _variant_name(w, ext)
+        for w in widths for ext in ("webp", "jpg")
+    }
+    if all(_is_fresh(p, source) for p in targets.values()):
+        return targets
+
+    from PIL import Image  # dependensi streamlit, hanya perlu saat membangun varian
+
+    with Image.open(source) as img:
+        img = img.convert("RGB")
+        for (w, ext), out_path in targets.items():
+            if _is_fresh(out_path, source):
+                continue
+            resized = img
+            if img.width > w:
+                h = round(img.height * w / img.width)
+                resized = img.resize((w, h), Image.LANCZOS)
+            # Nama tmp per proses: beberapa worker bisa membangun varian bersamaan
+            tmp_path = out_path.with_name(f"{out_path.name}.{os.getpid()}.tmp")
+            if ext == "webp":
+                resized.save(tmp_path, "WEBP", quality=WEBP_QUALITY, method=6)
+            else:
+                resized.save(tmp_path, "JPEG", quality=JPEG_QUALITY,
+                             optimize=True, progressive=True)
+            os.replace(tmp_path, out_path)
+
+    return targets
+
+
+def _content_hash(path: Path) -> str:
+    return hashlib.sha1(path.read_bytes()).hexdigest()[:10]
+
+
+@lru_cache(maxsize=None)
+def header_background_css(static_serving: bool = True) -> str:
+    """
+    Deklarasi CSS `background-image` untuk banner, dihitung sekali per proses.
+    Kosong jika foto header tidak ada.
+    """
+    try:
+        variants = build_header_variants()
+    except (ImportError, OSError):
+        variants = {}  # Pillow tidak ada / static/ tidak bisa ditulis: pakai base64
+
+    if static_serving and variants:
+        w = max(DISPLAY_WIDTHS)
+
+        def url(ext):
+            path = variants[(w, ext)]
+            return f'url("{STATIC_URL}/{path.name}?v={_content_hash(path)}")'
+
+        # Deklarasi pertama = fallback untuk browser tanpa dukungan image-set()
+        return (
+            f'background-image: {url("jpg")}; '
+            f'background-image: image-set({url("webp")} type("image/webp"), '
+            f'{url("jpg")} type("image/jpeg"));'
+        )
+
+    # Fallback: embed varian JPEG terkecil (atau foto asli) sebagai data URI
+    if variants:
+        path = variants[(min(DISPLAY_WIDTHS), "jpg")]
+    elif HEADER_SOURCE.exists():
+        path = HEADER_SOURCE
+    else:
+        return ""
+    b64 = base64.b64encode(path.read_bytes()).decode("utf-8")
+    return f'background-image: url("data:image/jpeg;base64,{b64}");'
+
+
+if __name__ == "__main__":
+    for (w, ext), p in sorted(build_header_variants().items()):
+        print(f"[assets] {w}px {ext}: {p} ({p.stat().st_size / 1024:.0f} KB)")
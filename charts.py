@@ -0,0 +1,202 @@
+# charts.py
+"""
+Lapisan data grafik untuk dashboard.
+
+Riwayat harga di-downsample dengan LTTB (Largest-Triangle-Three-Buckets) ke
+resolusi yang memang terlihat di layar, dan trace otomatis pindah ke WebGL
+(Scattergl) jika titiknya banyak, sehingga ukuran JSON figure & waktu render
+tetap terbatas meski riwayat bertambah panjang.
+
+Dipakai di app.py dengan:
+    from charts import build_overlay_figure
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# ~lebar plot dalam piksel; lebih dari ini tidak ada bedanya secara visual
+HISTORY_MAX_POINTS = 1000
+# Di atas jumlah titik ini marker disembunyikan (garis saja)
+MARKER_MAX_POINTS = 400
+# Di atas jumlah titik ini trace dirender dengan WebGL. Harus < HISTORY_MAX_POINTS:
+# riwayat sudah di-downsample sebelum jenis trace dipilih
+WEBGL_THRESHOLD = 500
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indeks titik terpilih LTTB. Titik pertama & terakhir selalu ikut;
+    bentuk visual (puncak / lembah) dipertahankan.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n_out - 2 bucket di antara titik pertama & terakhir
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # rata-rata bucket berikutnya (atau titik terakhir untuk bucket terakhir)
+        nxt_start, nxt_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nxt_start:nxt_end].mean()
+        avg_y = y[nxt_start:nxt_end].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        out[i + 1] = a
+
+    return out
+
+
+def downsample_series(df: pd.DataFrame, x_col: str, y_col: str,
+                      max_points: int = HISTORY_MAX_POINTS) -> pd.DataFrame:
+    """Downsample deret waktu (sudah urut x) dengan LTTB; tidak berubah jika sudah kecil."""
+    if len(df) <= max_points:
+        return df
+    x = pd.to_datetime(df[x_col]).to_numpy().astype("datetime64[ns]").astype(np.int64)
+    idx = lttb_indices(x, df[y_col].to_numpy(), max_points)
+    return df.iloc[idx]
+
+
+def _scatter(n_points: int, **kwargs):
+    """Scatter biasa untuk deret pendek, Scattergl untuk deret panjang."""
+    trace_cls = go.Scattergl if n_points > WEBGL_THRESHOLD else go.Scatter
+    mode = "lines+markers" if n_points <= MARKER_MAX_POINTS else "lines"
+    return trace_cls(mode=mode, **kwargs)
+
+
+def build_overlay_figure(
+    df_sub: pd.DataFrame,
+    df_pred: pd.DataFrame,
+    komoditas: str,
+    pasar: str,
+    forecast_days: int,
+    max_points: int = HISTORY_MAX_POINTS,
+) -> go.Figure:
+    """Grafik overlay riwayat (aktual) + prediksi, dengan garis batas tanggal terakhir."""
+    df_hist = downsample_series(df_sub, "tanggal", "harga", max_points)
+    last_actual_date = df_sub["tanggal"].max()
+
+    fig = go.Figure()
+
+    fig.add_trace(_scatter(
+        len(df_hist),
+        x=df_hist["tanggal"],
+        y=df_hist["harga"],
+        name="Aktual",
+        hovertemplate="<b>%{x|%d-%m-%Y}</b><br>Aktual: <b>Rp %{y:,.0f}</b><extra></extra>",
+    ))
+
+    fig.add_trace(_scatter(
+        len(df_pred),
+        x=df_pred["tanggal"],
+        y=df_pred["prediksi"],
+        name="Prediksi",
+        line=dict(dash="dash"),
+        hovertemplate="<b>%{x|%d-%m-%Y}</b><br>Prediksi: <b>Rp %{y:,.0f}</b><extra></extra>",
+    ))
+
+    fig.add_shape(
+        type="line",
+        x0=last_actual_date,
+        x1=last_actual_date,
+        y0=0,
+        y1=1,
+        xref="x",
+        yref="paper",
+        line=dict(color="gray", width=2, dash="dot"),
+    )
+
+    fig.update_layout(
+        title={"text": f"{komoditas} – Pasar {pasar} (Prediksi {forecast_days} hari)", "x": 0.5},
+        xaxis_title="Tanggal",
+        yaxis_title="Harga (Rp)",
+        template="plotly_white",
+        hovermode="x unified",
+        margin=dict(l=30, r=10, t=60, b=40),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+    )
+
+    return fig
+
+
+def build_scenario_figure(
+    df_sub: pd.DataFrame,
+    df_scen: pd.DataFrame,
+    komoditas: str,
+    pasar: str,
+    history_days: int = 90,
+) -> go.Figure:
+    """Grafik skenario what-if: riwayat terakhir + satu garis per skenario kejutan."""
+    df_hist = df_sub[df_sub["tanggal"] > df_sub["tanggal"].max() - pd.Timedelta(days=history_days)]
+
+    fig = go.Figure()
+    fig.add_trace(_scatter(
+        len(df_hist),
+        x=df_hist["tanggal"],
+        y=df_hist["harga"],
+        name="Aktual",
+        line=dict(color="gray"),
+        hovertemplate="<b>%{x|%d-%m-%Y}</b><br>Aktual: <b>Rp %{y:,.0f}</b><extra></extra>",
+    ))
+
+    for col in df_scen.columns.drop("tanggal"):
+        is_baseline = col == "Baseline"
+        fig.add_trace(go.Scatter(
+            x=df_scen["tanggal"],
+            y=df_scen[col],
+            mode="lines",
+            name=col,
+            line=dict(width=3 if is_baseline else 1.5, dash="solid" if is_baseline else "dash"),
+            hovertemplate=f"<b>%{{x|%d-%m-%Y}}</b><br>{col}: <b>Rp %{{y:,.0f}}</b><extra></extra>",
+        ))
+
+    fig.update_layout(
+        title={"text": f"Simulasi Kejutan Harga {komoditas} – Pasar {pasar}", "x": 0.5},
+        xaxis_title="Tanggal",
+        yaxis_title="Harga (Rp)",
+        template="plotly_white",
+        hovermode="x unified",
+        margin=dict(l=30, r=10, t=60, b=40),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+    )
+    return fig
+
+
+def render_png_chart(job: dict) -> str:
+    """
+    Render riwayat + prediksi satu pasangan ke PNG statis (matplotlib), untuk laporan
+    offline (export_report.py). Fungsi level modul agar bisa dikirim ke process pool.
+
+    job: pasar, komoditas, hist_tanggal, hist_harga, pred_tanggal, pred_harga, out_path
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import FuncFormatter
+
+    fig, ax = plt.subplots(figsize=(8, 3.6), dpi=110)
+    ax.plot(job["hist_tanggal"], job["hist_harga"], color="gray", linewidth=1.5, label="Aktual")
+    ax.plot(job["pred_tanggal"], job["pred_harga"], color="tab:red", linewidth=2,
+            linestyle="--", label=f"Prediksi {len(job['pred_harga'])} hari")
+    ax.set_title(f"{job['komoditas']} – Pasar {job['pasar']}")
+    ax.set_ylabel("Harga (Rp)")
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda v, _: f"{v:,.0f}"))
+    ax.grid(alpha=0.3)
+    ax.legend(loc="upper left", fontsize=8)
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    fig.savefig(job["out_path"])
+    plt.close(fig)
+    return job["out_path"]
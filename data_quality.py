@@ -0,0 +1,116 @@
+# data_quality.py
+"""
+Deteksi anomali harga saat ingest, dihitung vektor untuk semua deret sekaligus:
+- robust z-score terhadap median & MAD bergulir per (pasar, komoditas),
+- lonjakan hari-ke-hari (rasio terhadap harga tercatat sebelumnya),
+- konsistensi antar pasar (rasio terhadap rata-rata pasar lain, komoditas & tanggal sama),
+- harga <= 0.
+
+Titik yang dinilai anomali dipindah ke tabel karantina sehingga tidak ikut
+training (MinMaxScaler) maupun forecast; di deret harian ia menjadi hari kosong
+yang diisi lewat utils.align_daily_calendar.
+
+Dipakai di app.py dengan:
+    from data_quality import split_quarantine
+"""
+
+import numpy as np
+import pandas as pd
+
+
+ROLLING_WINDOW = 31      # hari observasi, di tengah (center)
+Z_THRESHOLD = 6.0        # |robust z| di atas ini = menyimpang dari pola lokal
+JUMP_RATIO = 2.0         # naik > 2x atau turun < 1/2x dari harga sebelumnya
+CROSS_MARKET_RATIO = 3.0 # > 3x atau < 1/3x rata-rata pasar lain
+
+_KEYS = ["tanggal", "pasar", "komoditas"]
+
+
+def _stack(wide: pd.DataFrame) -> pd.Series:
+    return wide.stack(["pasar", "komoditas"], future_stack=True)
+
+
+def detect_price_anomalies(
+    df: pd.DataFrame,
+    window: int = ROLLING_WINDOW,
+    z_threshold: float = Z_THRESHOLD,
+    jump_ratio: float = JUMP_RATIO,
+    cross_ratio: float = CROSS_MARKET_RATIO,
+) -> pd.DataFrame:
+    """
+    Tambahkan kolom skor & flag anomali ke data panjang (output prepare_price_dataframe):
+        robust_z, jump_ratio, cross_ratio,
+        flag_robust_z, flag_jump, flag_cross_market, is_anomaly, alasan
+
+    is_anomaly = harga <= 0, atau robust z ekstrem yang dikonfirmasi lonjakan
+    hari-ke-hari ATAU ketidakcocokan antar pasar (mis. kelebihan satu angka nol).
+    """
+    if df is None or df.empty:
+        return df
+
+    # ---- per deret: robust z & lonjakan (frame lebar, semua deret sekaligus) ----
+    wide = df.pivot_table(
+        index="tanggal", columns=["pasar", "komoditas"], values="harga",
+        aggfunc="last", observed=True,
+    ).astype("float64")
+
+    roll = dict(window=window, center=True, min_periods=max(3, window // 4))
+    med = wide.rolling(**roll).median()
+    mad = (wide - med).abs().rolling(**roll).median()
+    # MAD bisa 0 untuk harga yang lama tidak berubah -> beri batas bawah 1% median
+    scale = np.maximum(1.4826 * mad, 0.01 * med.abs())
+    z = (wide - med) / scale
+    jump = wide / wide.ffill().shift(1)
+
+    scores = pd.DataFrame({"robust_z": _stack(z), "jump_ratio": _stack(jump)})
+    scores.index = scores.index.set_names(_KEYS)
+    out = df.merge(scores.reset_index(), on=_KEYS, how="left")
+
+    # ---- antar pasar: rasio terhadap rata-rata pasar lain (leave-one-out) ----
+    g = out.groupby(["tanggal", "komoditas"], observed=True)["harga"]
+    n = g.transform("count")
+    others_mean = (g.transform("sum") - out["harga"]) / (n - 1).where(n > 1)
+    out["cross_ratio"] = out["harga"] / others_mean
+
+    def outside(ratio, limit):
+        return (ratio > limit) | (ratio < 1.0 / limit)
+
+    out["flag_robust_z"] = out["robust_z"].abs() > z_threshold
+    out["flag_jump"] = outside(out["jump_ratio"], jump_ratio)
+    out["flag_cross_market"] = outside(out["cross_ratio"], cross_ratio)
+    non_positive = out["harga"] <= 0
+
+    out["is_anomaly"] = non_positive | (
+        out["flag_robust_z"] & (out["flag_jump"] | out["flag_cross_market"])
+    )
+
+    reasons = [
+        (non_positive, "harga<=0"),
+        (out["flag_robust_z"], "robust_z"),
+        (out["flag_jump"], "lonjakan"),
+        (out["flag_cross_market"], "antar_pasar"),
+    ]
+    alasan = pd.Series("", index=out.index)
+    for mask, label in reasons:
+        alasan = alasan.where(~mask, alasan + label + ",")
+    out["alasan"] = alasan.str.rstrip(",")
+
+    return out
+
+
+def split_quarantine(df: pd.DataFrame, **kwargs):
+    """
+    Pisahkan data bersih dan tabel karantina.
+
+    Return (df_bersih, df_karantina):
+        df_bersih    : kolom sama seperti input, tanpa baris anomali
+        df_karantina : baris anomali + skor & alasan
+    """
+    if df is None or df.empty:
+        return df, pd.DataFrame()
+
+    flagged = detect_price_anomalies(df, **kwargs)
+    mask = flagged["is_anomaly"].to_numpy()
+    df_clean = df[~mask].reset_index(drop=True)
+    df_quarantine = flagged[mask].reset_index(drop=True)
+    return df_clean, df_quarantine
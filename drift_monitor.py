@@ -0,0 +1,271 @@
+# drift_monitor.py
+"""
+Monitoring drift forecast terhadap harga aktual yang masuk belakangan.
+
+- record_forecast : simpan setiap forecast yang dikeluarkan (per pasangan & tanggal terbit)
+- ingest_actuals  : saat harga aktual baru masuk, cocokkan dengan forecast yang tertunda
+                    dan perbarui statistik error per pasangan secara inkremental
+- drifting_pairs  : pasangan yang rolling MAE-nya melewati MAE di meta.json x threshold,
+                    supaya retraining cukup menyasar model yang drift
+
+MAE di meta.json adalah error satu langkah ke depan (test set train_lstm_for), sedangkan
+forecast dashboard adalah rollout autoregresif 1..60 hari yang error-nya membesar
+seiring lead. Karena itu drift dinilai hanya dari error lead DRIFT_LEAD (hari pertama
+setelah issued_at); error lead lain tetap dicatat per lead (stats["by_lead"]) sebagai info.
+
+State disimpan per pasangan di monitoring/<PASAR>__<KOMODITAS>__WS<n>.json
+(ditulis atomik lewat file sementara + os.replace). Baca-ubah-tulis state dijaga
+lock file per pasangan (<...>.lock), karena setiap worker dashboard memanggil
+record_forecast dan ingest_actuals: tanpa lock, ingest yang bertumpuk dengan record
+bisa menimpa forecast yang baru dicatat sehingga forecast itu tidak pernah dinilai.
+
+Jalankan:
+    python drift_monitor.py            # ingest CSV & tulis monitoring/drifting_pairs.csv
+    python drift_monitor.py --threshold 1.3
+"""
+
+import argparse
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from models_lstm import _artifact_base, list_artifacts, read_meta
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+MONITOR_DIR = Path("monitoring")
+DRIFT_THRESHOLD = 1.5      # rolling MAE > 1.5 x MAE saat training
+ROLLING_N = 60             # jumlah error terakhir untuk rolling MAE
+EWMA_ALPHA = 0.1
+MIN_ERRORS = 7             # minimal error lead-1 tercatat sebelum pasangan bisa dinilai drift
+DRIFT_LEAD = 1             # lead (hari setelah issued_at) yang sebanding dengan MAE meta.json
+
+
+def _state_path(pasar: str, komoditas: str, window_size: int) -> Path:
+    return MONITOR_DIR / f"{_artifact_base(pasar, komoditas, window_size)}.json"
+
+
+@contextmanager
+def _pair_lock(pasar: str, komoditas: str, window_size: int):
+    """Lock eksklusif antarproses untuk state satu pasangan (blok sampai lock didapat)."""
+    MONITOR_DIR.mkdir(parents=True, exist_ok=True)
+    lock_path = _state_path(pasar, komoditas, window_size).with_suffix(".lock")
+    with open(lock_path, "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _empty_state(pasar: str, komoditas: str) -> dict:
+    return {
+        "pasar": pasar,
+        "komoditas": komoditas,
+        "forecasts": {},  # issued_at -> {"tanggal": [...], "prediksi": [...]}
+        "stats": _empty_stats(),
+    }
+
+
+def _empty_stats() -> dict:
+    return {
+        "lead": DRIFT_LEAD,     # n / sum / ewma / recent hanya untuk error lead ini
+        "n": 0,
+        "sum_abs_err": 0.0,
+        "ewma_abs_err": None,
+        "recent_abs_err": [],
+        "by_lead": {},          # "lead" -> [n, sum_abs_err] untuk semua lead
+        "last_actual": None,
+    }
+
+
+def _load_state(pasar: str, komoditas: str, window_size: int) -> dict:
+    path = _state_path(pasar, komoditas, window_size)
+    if not path.exists():
+        return _empty_state(pasar, komoditas)
+    state = json.loads(path.read_text(encoding="utf-8"))
+    if state["stats"].get("lead") != DRIFT_LEAD:
+        # State versi lama mencampur error semua lead: mulai ulang statistiknya,
+        # forecast tertunda & posisi last_actual tetap dipakai
+        stats = _empty_stats()
+        stats["last_actual"] = state["stats"].get("last_actual")
+        state["stats"] = stats
+    return state
+
+
+def _save_state(state: dict, window_size: int):
+    MONITOR_DIR.mkdir(parents=True, exist_ok=True)
+    path = _state_path(state["pasar"], state["komoditas"], window_size)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def record_forecast(pasar: str, komoditas: str, df_pred: pd.DataFrame,
+                    issued_at, window_size: int = 30) -> bool:
+    """
+    Simpan forecast yang dikeluarkan. issued_at = tanggal aktual terakhir saat forecast dibuat.
+    Forecast yang sama (pasangan + issued_at) hanya disimpan sekali; horizon yang lebih
+    panjang menggantikan yang lebih pendek. Return True jika state berubah.
+    """
+    if df_pred is None or df_pred.empty:
+        return False
+
+    key = str(pd.Timestamp(issued_at).date())
+    forecast = {
+        "tanggal": pd.to_datetime(df_pred["tanggal"]).dt.strftime("%Y-%m-%d").tolist(),
+        "prediksi": [float(v) for v in df_pred["prediksi"]],
+    }
+    with _pair_lock(pasar, komoditas, window_size):
+        state = _load_state(pasar, komoditas, window_size)
+        existing = state["forecasts"].get(key)
+        if existing is not None and len(existing["tanggal"]) >= len(df_pred):
+            return False
+
+        state["forecasts"][key] = forecast
+        _save_state(state, window_size)
+    return True
+
+
+def _update_stats(stats: dict, errors: pd.Series):
+    """Tambahkan error absolut (urut tanggal) ke statistik berjalan."""
+    ewma = stats["ewma_abs_err"]
+    for err in errors:
+        ewma = err if ewma is None else EWMA_ALPHA * err + (1 - EWMA_ALPHA) * ewma
+    stats["ewma_abs_err"] = ewma
+    stats["n"] += int(len(errors))
+    stats["sum_abs_err"] += float(errors.sum())
+    stats["recent_abs_err"] = (stats["recent_abs_err"] + [float(e) for e in errors])[-ROLLING_N:]
+
+
+def ingest_actuals(df: pd.DataFrame, window_size: int = 30) -> int:
+    """
+    Cocokkan harga aktual (data panjang) dengan forecast tertunda semua pasangan.
+    Hanya tanggal setelah 'last_actual' tiap pasangan yang diproses, jadi aman dipanggil
+    berulang pada dataset penuh. Return jumlah error baru yang tercatat.
+    """
+    total = 0
+    for (pasar, komoditas), df_pair in df.groupby(["pasar", "komoditas"], observed=True):
+        path = _state_path(pasar, komoditas, window_size)
+        if not path.exists():
+            continue  # belum pernah ada forecast untuk pasangan ini
+
+        with _pair_lock(pasar, komoditas, window_size):
+            state = _load_state(pasar, komoditas, window_size)
+            stats = state["stats"]
+            last_actual = pd.Timestamp(stats["last_actual"]) if stats["last_actual"] else None
+
+            actuals = df_pair[["tanggal", "harga"]]
+            if last_actual is not None:
+                actuals = actuals[actuals["tanggal"] > last_actual]
+            if actuals.empty or not state["forecasts"]:
+                continue
+
+            pending = pd.concat(
+                [pd.DataFrame({"issued_at": pd.Timestamp(k), **v}) for k, v in state["forecasts"].items()],
+                ignore_index=True,
+            )
+            pending["tanggal"] = pd.to_datetime(pending["tanggal"])
+            matched = pending.merge(actuals, on="tanggal", how="inner")
+            matched = matched[matched["tanggal"] > matched["issued_at"]].sort_values("tanggal")
+
+            errors = (matched["harga"].astype(float) - matched["prediksi"]).abs()
+            leads = (matched["tanggal"] - matched["issued_at"]).dt.days
+            for lead, err in errors.groupby(leads):
+                n, total_err = stats["by_lead"].get(str(lead), [0, 0.0])
+                stats["by_lead"][str(lead)] = [n + int(len(err)), total_err + float(err.sum())]
+            _update_stats(stats, errors[leads == DRIFT_LEAD])
+            total += len(errors)
+
+            new_last = actuals["tanggal"].max()
+            stats["last_actual"] = str(new_last.date())
+            # Forecast yang seluruh tanggalnya sudah lewat tidak perlu disimpan lagi
+            state["forecasts"] = {
+                k: v for k, v in state["forecasts"].items()
+                if pd.Timestamp(v["tanggal"][-1]) > new_last
+            }
+            _save_state(state, window_size)
+
+    return total
+
+
+def _meta_mae(pasar: str, komoditas: str, window_size: int) -> Optional[float]:
+    return read_meta(pasar, komoditas, window_size).get("mae")
+
+
+def drifting_pairs(threshold: float = DRIFT_THRESHOLD, window_size: int = 30) -> pd.DataFrame:
+    """
+    Ringkasan error semua pasangan yang dimonitor.
+    n_errors / rolling_mae / ewma_mae / ratio dihitung dari error lead DRIFT_LEAD saja
+    (sebanding dengan MAE satu langkah di meta.json); mae_all_leads = rata-rata semua lead.
+    Kolom: pasar, komoditas, n_errors, rolling_mae, ewma_mae, mae_all_leads, meta_mae, ratio, drifting
+    """
+    rows = []
+    for pasar, komoditas in list_artifacts(window_size):
+        if not _state_path(pasar, komoditas, window_size).exists():
+            continue
+        stats = _load_state(pasar, komoditas, window_size)["stats"]
+        recent = stats["recent_abs_err"]
+        rolling_mae = sum(recent) / len(recent) if recent else None
+        meta_mae = _meta_mae(pasar, komoditas, window_size)
+        ratio = rolling_mae / meta_mae if rolling_mae is not None and meta_mae else None
+        n_all = sum(n for n, _ in stats["by_lead"].values())
+        sum_all = sum(total for _, total in stats["by_lead"].values())
+        rows.append({
+            "pasar": pasar,
+            "komoditas": komoditas,
+            "n_errors": stats["n"],
+            "rolling_mae": rolling_mae,
+            "ewma_mae": stats["ewma_abs_err"],
+            "mae_all_leads": sum_all / n_all if n_all else None,
+            "meta_mae": meta_mae,
+            "ratio": ratio,
+            "drifting": bool(ratio is not None and stats["n"] >= MIN_ERRORS and ratio > threshold),
+        })
+    return pd.DataFrame(rows, columns=[
+        "pasar", "komoditas", "n_errors", "rolling_mae", "ewma_mae", "mae_all_leads", "meta_mae", "ratio",
+        "drifting",
+    ])
+
+
+def main():
+    from data_quality import split_quarantine
+    from utils import prepare_price_dataframe
+
+    parser = argparse.ArgumentParser(description="Ingest harga aktual & deteksi model yang drift.")
+    parser.add_argument("--data", default="harga_pasar_2024_2025.csv")
+    parser.add_argument("--window-size", type=int, default=30)
+    parser.add_argument("--threshold", type=float, default=DRIFT_THRESHOLD)
+    args = parser.parse_args()
+
+    df, _ = split_quarantine(prepare_price_dataframe(pd.read_csv(args.data)))
+    n_new = ingest_actuals(df, args.window_size)
+    print(f"[drift_monitor] {n_new} error baru tercatat.")
+
+    report = drifting_pairs(args.threshold, args.window_size)
+    MONITOR_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = MONITOR_DIR / "drifting_pairs.csv"
+    report.to_csv(out_path, index=False)
+    print(report[report["drifting"]].to_string(index=False) if report["drifting"].any()
+          else "[drift_monitor] Tidak ada model yang drift.")
+    print(f"[drift_monitor] Laporan ditulis ke {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+# export_report.py
+"""
+Export buletin mingguan offline: tabel prediksi, grafik, dan saran kebijakan untuk
+SEMUA pasar x komoditas yang punya artefak, tanpa membuka dashboard satu per satu.
+
+- Forecast dihitung batch: seluruh pasangan dijalankan dalam SATU rollout dengan bobot
+  per sampel (lstm_forward). Bobot diambil dari store bersama (model_store.py) jika
+  sudah di-export, selain itu dari .keras di artifacts/ (lebih lambat karena tiap model
+  di-deserialisasi, tapi tetap satu rollout).
+- Grafik (matplotlib, PNG) dirender paralel di process pool (charts.render_png_chart).
+  Worker di-spawn dan modul ini tidak meng-import TensorFlow di level atas, jadi worker
+  tidak ikut memuat TF.
+- File ditulis begitu siap (tabel & teks kebijakan langsung, grafik saat task selesai),
+  sehingga isi folder output bisa dipakai walau export belum selesai seluruhnya.
+
+Output (default reports/<tanggal data terakhir>/):
+    buletin.md              saran kebijakan semua pasangan, dikelompokkan per pasar
+    ringkasan.csv           satu baris per pasangan (harga terakhir, rata-rata prediksi, ...)
+    tabel/<BASE>.csv        prediksi harian per pasangan
+    grafik/<BASE>.png       riwayat + prediksi per pasangan
+    buletin.xlsx            ringkasan + seluruh prediksi (hanya jika openpyxl terpasang)
+
+Jalankan:
+    python export_report.py
+    python export_report.py --days 14 --workers 8 --out reports/minggu_ini
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Modul yang memuat TensorFlow (models_lstm, model_store) hanya di-import di dalam fungsi:
+# worker "spawn" meng-import ulang modul ini sebagai __mp_main__, dan render grafik
+# tidak butuh TF.
+from aggregates import compute_rollups, latest_volatility
+from charts import render_png_chart
+from data_quality import split_quarantine
+from price_cube import get_price_cube
+from utils import kebijakan_saran, prepare_price_dataframe
+
+DATA_PATH = "harga_pasar_2024_2025.csv"
+REPORT_DIR = Path("reports")
+WINDOW_SIZE = 30
+FORECAST_DAYS = 30
+POLICY_HORIZON = 7
+CHART_HISTORY_DAYS = 90
+
+
+# ---------- forecast batch ----------
+
+def _last_windows(cube, pairs, window_size: int):
+    """Window harga harian terakhir (Rp) + tanggal terakhir per pasangan; pasangan dengan data kurang dilewati."""
+    from models_lstm import _to_daily, artifact_fill, read_meta
+
+    windows = {}
+    for pasar, komoditas in pairs:
+        fill = artifact_fill(read_meta(pasar, komoditas, window_size))
+        df_sub = _to_daily(cube.series_frame(pasar, komoditas), fill)
+        if len(df_sub) < window_size:
+            print(f"[export_report] Lewati {pasar} / {komoditas}: data historis kurang dari window_size.")
+            continue
+        windows[(pasar, komoditas)] = (
+            df_sub["harga"].to_numpy(dtype=np.float64)[-window_size:],
+            df_sub["tanggal"].max(),
+        )
+    return windows
+
+
+def _forecast_frame(preds: np.ndarray, last_date) -> pd.DataFrame:
+    return pd.DataFrame({
+        "tanggal": pd.date_range(start=last_date + pd.Timedelta(days=1), periods=len(preds), freq="D"),
+        "prediksi": preds,
+    })
+
+
+def batched_forecasts(cube, pairs, n_days: int = FORECAST_DAYS, window_size: int = WINDOW_SIZE) -> dict:
+    """
+    Forecast n_days untuk semua pasangan dalam SATU rollout. Return {(pasar, komoditas): df_pred}.
+
+    Bobot tiap pasangan diambil dari model store (memmap) jika ada, atau dari .keras di
+    artifacts/ (get_weights, dimuat sekali), lalu ditumpuk per sampel untuk lstm_forward;
+    setiap window diskalakan dengan scaler pasangannya sendiri. Hanya model dengan
+    arsitektur berbeda yang jatuh ke rollout per model.
+    """
+    from model_store import WEIGHT_NAMES, NumpyLSTM, open_model_store
+    from models_lstm import _rollout, forecast_lstm_batch, load_artifacts
+
+    windows = _last_windows(cube, pairs, window_size)
+    store = open_model_store()
+    if store is not None and store.window_size != window_size:
+        store = None
+
+    keys, rows, scalers, per_model = [], [], [], []
+    for key in windows:
+        i = store.index_of(*key) if store is not None else None
+        if i is not None:
+            weights, scaler = store.model_weights(i), store.scaler(i)
+        else:
+            loaded = load_artifacts(*key, window_size)
+            if loaded is None:
+                continue
+            raw = loaded["model"].get_weights()
+            weights, scaler = dict(zip(WEIGHT_NAMES, raw)), loaded["scaler"]
+            if len(raw) != len(WEIGHT_NAMES) or (
+                rows and any(weights[n].shape != rows[0][n].shape for n in WEIGHT_NAMES)
+            ):
+                per_model.append((key, loaded))  # arsitektur berbeda: tidak bisa ditumpuk
+                continue
+        keys.append(key)
+        rows.append(weights)
+        scalers.append(scaler)
+
+    forecasts = {}
+    if keys:
+        windows_scaled = np.stack([
+            scaler.transform(windows[key][0].reshape(-1, 1)).ravel()
+            for key, scaler in zip(keys, scalers)
+        ])
+        # Bobot per sampel: (N, ...) sesuai urutan window
+        model = NumpyLSTM({
+            name: np.stack([w[name] for w in rows]).astype(np.float32) for name in WEIGHT_NAMES
+        })
+        preds_scaled = _rollout(model, windows_scaled, n_days)
+        for row, (key, scaler) in enumerate(zip(keys, scalers)):
+            preds = scaler.inverse_transform(preds_scaled[row].reshape(-1, 1)).ravel()
+            forecasts[key] = _forecast_frame(preds, windows[key][1])
+
+    for key, loaded in per_model:
+        window, last_date = windows[key]
+        preds = forecast_lstm_batch(loaded["model"], loaded["scaler"], window[None, :], n_days)[0]
+        forecasts[key] = _forecast_frame(preds, last_date)
+    return forecasts
+
+
+# ---------- export ----------
+
+def _summary_row(pasar: str, komoditas: str, df_hist: pd.DataFrame, df_pred: pd.DataFrame) -> dict:
+    last_actual = float(df_hist["harga"].iloc[-1])
+    head = df_pred["prediksi"].head(POLICY_HORIZON)
+    return {
+        "pasar": pasar,
+        "komoditas": komoditas,
+        "tanggal_terakhir": df_hist["tanggal"].iloc[-1].date(),
+        "harga_terakhir": last_actual,
+        f"rata_prediksi_{POLICY_HORIZON}h": float(head.mean()),
+        f"perubahan_{POLICY_HORIZON}h_pct": (float(head.mean()) / last_actual - 1) * 100 if last_actual else None,
+        f"prediksi_hari_{len(df_pred)}": float(df_pred["prediksi"].iloc[-1]),
+    }
+
+
+def export_report(
+    df: pd.DataFrame,
+    out_dir: Path,
+    n_days: int = FORECAST_DAYS,
+    window_size: int = WINDOW_SIZE,
+    workers: Optional[int] = None,
+    charts: bool = True,
+    data_path: str = DATA_PATH,
+) -> dict:
+    """Tulis buletin lengkap ke out_dir. Return ringkasan jumlah file & waktu per tahap."""
+    from models_lstm import _artifact_base, list_artifacts
+
+    t0 = time.perf_counter()
+    cube = get_price_cube(df, data_path)
+    rollups = compute_rollups(df)
+    pairs = sorted(list_artifacts(window_size))
+    forecasts = batched_forecasts(cube, pairs, n_days, window_size)
+    t_forecast = time.perf_counter() - t0
+
+    table_dir, chart_dir = out_dir / "tabel", out_dir / "grafik"
+    table_dir.mkdir(parents=True, exist_ok=True)
+    if charts:
+        chart_dir.mkdir(parents=True, exist_ok=True)
+
+    rows, policy_by_market, futures = [], {}, []
+    pool = ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    with pool:
+        for (pasar, komoditas), df_pred in forecasts.items():
+            base = _artifact_base(pasar, komoditas, window_size)
+            df_hist = cube.series_frame(pasar, komoditas)
+
+            table_path = table_dir / f"{base}.csv"
+            df_pred.to_csv(table_path, index=False, float_format="%.0f")
+            print(f"[export_report] {table_path}")
+
+            rows.append(_summary_row(pasar, komoditas, df_hist, df_pred))
+            policy_by_market.setdefault(pasar, []).append(kebijakan_saran(
+                df_hist, df_pred,
+                horizon_analisis=POLICY_HORIZON,
+                hist_volatility=latest_volatility(rollups, pasar, komoditas),
+            ))
+
+            if charts:
+                df_recent = df_hist[df_hist["tanggal"] > df_hist["tanggal"].max() - pd.Timedelta(days=CHART_HISTORY_DAYS)]
+                futures.append(pool.submit(render_png_chart, {
+                    "pasar": pasar,
+                    "komoditas": komoditas,
+                    "hist_tanggal": df_recent["tanggal"].to_numpy(),
+                    "hist_harga": df_recent["harga"].to_numpy(),
+                    "pred_tanggal": df_pred["tanggal"].to_numpy(),
+                    "pred_harga": df_pred["prediksi"].to_numpy(),
+                    "out_path": str(chart_dir / f"{base}.png"),
+                }))
+
+        # Tabel & teks ditulis selagi grafik masih dirender di pool
+        summary = pd.DataFrame(rows)
+        summary.to_csv(out_dir / "ringkasan.csv", index=False)
+        _write_bulletin(out_dir / "buletin.md", policy_by_market, n_days)
+        print(f"[export_report] {out_dir / 'ringkasan.csv'}")
+        print(f"[export_report] {out_dir / 'buletin.md'}")
+
+        n_charts = 0
+        for fut in as_completed(futures):
+            try:
+                print(f"[export_report] {fut.result()}")
+                n_charts += 1
+            except Exception as e:
+                print(f"[export_report] Gagal render grafik: {e}")
+
+    excel_path = _write_excel(out_dir / "buletin.xlsx", summary, forecasts)
+    if excel_path is not None:
+        print(f"[export_report] {excel_path}")
+
+    return {
+        "pairs": len(forecasts),
+        "charts": n_charts,
+        "forecast_s": t_forecast,
+        "total_s": time.perf_counter() - t0,
+    }
+
+
+def _write_bulletin(path: Path, policy_by_market: dict, n_days: int):
+    lines = [f"# Buletin Harga Pangan – Prediksi {n_days} Hari", ""]
+    for pasar in sorted(policy_by_market):
+        lines += [f"## Pasar {pasar}", ""]
+        for text in policy_by_market[pasar]:
+            lines += [text, "", "---", ""]
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+def _write_excel(path: Path, summary: pd.DataFrame, forecasts: dict):
+    """Ringkasan + prediksi (format panjang) dalam satu workbook; dilewati tanpa openpyxl."""
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        print("[export_report] openpyxl tidak terpasang; buletin.xlsx dilewati (CSV tetap ditulis).")
+        return None
+
+    df_long = pd.concat(
+        [df_pred.assign(pasar=pasar, komoditas=komoditas) for (pasar, komoditas), df_pred in forecasts.items()],
+        ignore_index=True,
+    )[["pasar", "komoditas", "tanggal", "prediksi"]] if forecasts else pd.DataFrame()
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        summary.to_excel(writer, sheet_name="Ringkasan", index=False)
+        df_long.to_excel(writer, sheet_name="Prediksi", index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export buletin prediksi harga semua pasar & komoditas.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--days", type=int, default=FORECAST_DAYS, help="horizon prediksi (hari)")
+    parser.add_argument("--window-size", type=int, default=WINDOW_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="proses render grafik (default: jumlah CPU)")
+    parser.add_argument("--out", help="folder output (default: reports/<tanggal data terakhir>)")
+    parser.add_argument("--no-charts", action="store_true", help="lewati render grafik")
+    args = parser.parse_args()
+
+    df, _ = split_quarantine(prepare_price_dataframe(pd.read_csv(args.data)))
+    out_dir = Path(args.out) if args.out else REPORT_DIR / str(df["tanggal"].max().date())
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    result = export_report(df, out_dir, args.days, args.window_size, args.workers,
+                           charts=not args.no_charts, data_path=args.data)
+    print(f"[export_report] {result['pairs']} pasangan, {result['charts']} grafik -> {out_dir} "
+          f"(forecast {result['forecast_s']:.1f} s, total {result['total_s']:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
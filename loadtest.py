@@ -0,0 +1,238 @@
+# loadtest.py
+"""
+Harness uji beban offline untuk komputasi dashboard.
+
+Mensimulasikan banyak sesi pengguna bersamaan (thread) yang menjalankan skenario
+seperti di app.py: pilih pasar, ganti tanggal kartu, pilih komoditas, geser slider
+horizon, baca saran kebijakan. Setiap aksi memanggil fungsi yang sama dengan yang
+dipakai app.py (prepare_price_dataframe, split_quarantine, price_cube, ForecastWarmer,
+build_overlay_figure, kebijakan_saran) di atas dataset & artefak lokal, tanpa jaringan.
+
+Laporan: latensi p50/p95/p99/max per jenis aksi, throughput, dan memori (RSS).
+
+Jalankan:
+    python loadtest.py                         # 8 sesi x 30 aksi
+    python loadtest.py --sessions 32 --actions 50 --cold
+    python loadtest.py --json hasil_loadtest.json
+"""
+
+import argparse
+import json
+import random
+import resource
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from aggregates import compute_rollups, latest_volatility
+from charts import build_overlay_figure
+from data_quality import split_quarantine
+from model_store import open_model_store
+from prewarm import ForecastWarmer
+from price_cube import get_price_cube
+from utils import kebijakan_saran, prepare_price_dataframe
+
+DATA_PATH = "harga_pasar_2024_2025.csv"
+WINDOW_SIZE = 30
+HORIZON_MAX = 60
+HORIZON_MIN = 7
+
+
+def _rss_mb() -> float:
+    """RSS proses saat ini (MB); jatuh ke ru_maxrss jika /proc tidak tersedia."""
+    statm = Path("/proc/self/statm")
+    if statm.exists():
+        pages = int(statm.read_text().split()[1])
+        return pages * resource.getpagesize() / 1024 ** 2
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Backend:
+    """State bersama per proses, setara cache_resource / cache_data di app.py."""
+
+    def __init__(self, precision: str = "float32", workers: int = 4):
+        df_clean, _ = split_quarantine(prepare_price_dataframe(pd.read_csv(DATA_PATH)))
+        self.cube = get_price_cube(df_clean, DATA_PATH)
+        self.rollups = compute_rollups(df_clean)
+        store = open_model_store()
+        if store is not None and store.window_size != WINDOW_SIZE:
+            # Sama seperti app.py: store dengan window lain tidak punya model untuk WINDOW_SIZE
+            print(f"[loadtest] Model store WS={store.window_size} != {WINDOW_SIZE}; pakai artifacts/.")
+            store = None
+        self.warmer = ForecastWarmer(
+            series_fn=self.cube.series_frame,
+            window_size=WINDOW_SIZE,
+            precision=precision,
+            horizon=HORIZON_MAX,
+            max_workers=workers,
+            load_fn=(lambda p, k: store.load_artifacts(p, k, precision=precision)) if store is not None else None,
+        )
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.no_forecast = defaultdict(int)
+
+    def miss(self, action: str):
+        """Aksi selesai tanpa forecast (model tidak ada): latensinya tidak mengukur kerja model."""
+        with self._lock:
+            self.no_forecast[action] += 1
+
+    def timed(self, action: str, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.errors[action] += 1
+            return None
+        finally:
+            dt = (time.perf_counter() - t0) * 1000.0
+            with self._lock:
+                self.latencies[action].append(dt)
+
+
+def run_session(backend: Backend, rec: Recorder, n_actions: int, seed: int):
+    """Satu sesi pengguna: urutan aksi acak dengan bobot mirip pemakaian nyata."""
+    rng = random.Random(seed)
+    cube, warmer = backend.cube, backend.warmer
+
+    def select_market():
+        pasar = rng.choice(cube.pasar)
+        warmer.warm_market(pasar, cube.komoditas_for(pasar))
+        first, last = cube.date_bounds(pasar)
+        return pasar, cube.day_frame(pasar, last)
+
+    def change_date(pasar):
+        first, last = cube.date_bounds(pasar)
+        day = first + pd.Timedelta(days=rng.randrange((last - first).days + 1))
+        return cube.day_frame(pasar, day)
+
+    def select_commodity(pasar):
+        komoditas = rng.choice(cube.komoditas_for(pasar))
+        df_pred = warmer.forecast(pasar, komoditas)
+        if df_pred is None:
+            rec.miss("select_commodity")
+        return komoditas, df_pred
+
+    def drag_slider(pasar, komoditas):
+        n_days = rng.randint(HORIZON_MIN, HORIZON_MAX)
+        df_pred = warmer.forecast(pasar, komoditas)
+        if df_pred is None:
+            rec.miss("drag_slider")
+            return None
+        return build_overlay_figure(
+            cube.series_frame(pasar, komoditas), df_pred.head(n_days), komoditas, pasar, n_days
+        ).to_json()
+
+    def policy(pasar, komoditas):
+        return kebijakan_saran(
+            cube.series_frame(pasar, komoditas),
+            warmer.forecast(pasar, komoditas),
+            horizon_analisis=7,
+            hist_volatility=latest_volatility(backend.rollups, pasar, komoditas),
+        )
+
+    pasar, _ = rec.timed("select_market", select_market) or (cube.pasar[0], None)
+    komoditas = None
+    for _ in range(n_actions):
+        r = rng.random()
+        if r < 0.10:
+            result = rec.timed("select_market", select_market)
+            if result is not None:
+                pasar, komoditas = result[0], None
+        elif r < 0.30:
+            rec.timed("change_date", change_date, pasar)
+        elif r < 0.50 or komoditas is None:
+            result = rec.timed("select_commodity", select_commodity, pasar)
+            if result is not None:
+                komoditas = result[0]
+        elif r < 0.90:
+            rec.timed("drag_slider", drag_slider, pasar, komoditas)
+        else:
+            rec.timed("policy", policy, pasar, komoditas)
+
+
+def summarize(rec: Recorder, elapsed: float) -> pd.DataFrame:
+    rows = []
+    for action, values in sorted(rec.latencies.items()):
+        arr = np.asarray(values)
+        rows.append({
+            "aksi": action,
+            "n": len(arr),
+            "error": rec.errors.get(action, 0),
+            "tanpa_forecast": rec.no_forecast.get(action, 0),
+            "p50_ms": np.percentile(arr, 50),
+            "p95_ms": np.percentile(arr, 95),
+            "p99_ms": np.percentile(arr, 99),
+            "max_ms": arr.max(),
+            "per_detik": len(arr) / elapsed,
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uji beban offline komputasi dashboard.")
+    parser.add_argument("--sessions", type=int, default=8, help="jumlah sesi bersamaan")
+    parser.add_argument("--actions", type=int, default=30, help="aksi per sesi")
+    parser.add_argument("--workers", type=int, default=4, help="thread pre-warm per proses")
+    parser.add_argument("--precision", default="float32", choices=["float32", "float16", "int8"])
+    parser.add_argument("--cold", action="store_true",
+                        help="jangan pre-warm sebelum mulai (ukur latensi klik pertama)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="simpan laporan ke file JSON")
+    args = parser.parse_args()
+
+    rss_start = _rss_mb()
+    t0 = time.perf_counter()
+    backend = Backend(args.precision, args.workers)
+    startup_s = time.perf_counter() - t0
+
+    if not args.cold:
+        for pasar in backend.cube.pasar:
+            backend.warmer.warm_market(pasar, backend.cube.komoditas_for(pasar))
+            for komoditas in backend.cube.komoditas_for(pasar):
+                backend.warmer.forecast(pasar, komoditas)
+    rss_ready = _rss_mb()
+
+    rec = Recorder()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        for i in range(args.sessions):
+            pool.submit(run_session, backend, rec, args.actions, args.seed + i)
+    elapsed = time.perf_counter() - t0
+
+    report = summarize(rec, elapsed)
+    total = int(report["n"].sum()) if not report.empty else 0
+    memory = {"rss_start_mb": rss_start, "rss_ready_mb": rss_ready, "rss_end_mb": _rss_mb()}
+
+    print(report.round(2).to_string(index=False))
+    print(f"\nStartup (load data + cube + rollups): {startup_s:.2f} s")
+    n_missing = sum(rec.no_forecast.values())
+    if n_missing:
+        print(f"PERINGATAN: {n_missing} aksi tanpa forecast (artefak/model tidak ditemukan); "
+              "latensinya tidak mengukur inferensi model.")
+    print(f"Total {total} aksi dalam {elapsed:.2f} s -> {total / elapsed:.1f} aksi/detik")
+    print("Memori (MB): " + ", ".join(f"{k}={v:.0f}" for k, v in memory.items()))
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "config": vars(args),
+            "startup_s": startup_s,
+            "elapsed_s": elapsed,
+            "throughput_per_s": total / elapsed,
+            "memory": memory,
+            "actions": report.to_dict(orient="records"),
+        }, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# market_compare.py
+"""
+Perbandingan harga antar pasar untuk setiap komoditas:
+- spread harga (selisih Rp & %) antar setiap pasangan pasar,
+- korelasi perubahan harga harian dengan lag -max_lag..+max_lag hari,
+- sinyal lead/lag: pasar mana yang bergerak duluan.
+
+Semua pasangan (pasar x pasar x komoditas) dihitung sekaligus dengan operasi array
+di atas kubus harga (price_cube), bukan per klik / per pasangan, karena jumlah
+pasangan tumbuh kuadratik dengan jumlah pasar.
+
+Dipakai di app.py dengan:
+    from market_compare import compare_markets, pairs_for
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from price_cube import PriceCube, ffill_days
+
+
+MAX_LAG = 7
+# Minimal jumlah hari yang tumpang tindih agar korelasi dianggap bermakna
+MIN_OVERLAP = 30
+
+
+def _daily_returns(values: np.ndarray) -> np.ndarray:
+    """Perubahan harian (fraksi) dari deret ffill; NaN untuk hari tanpa observasi."""
+    observed = ~np.isnan(values)
+    filled = ffill_days(values)
+    prev, curr = filled[..., :-1], filled[..., 1:]
+    ok = observed[..., 1:] & ~np.isnan(prev) & (prev > 0)
+    ret = np.full(curr.shape, np.nan)
+    ret[ok] = curr[ok] / prev[ok] - 1.0
+    return ret
+
+
+def _standardize(ret: np.ndarray):
+    """z-score per deret di atas hari valid; hari tidak valid jadi 0 (tidak berkontribusi)."""
+    valid = ~np.isnan(ret)
+    n = np.maximum(valid.sum(axis=-1, keepdims=True), 1)
+    x = np.where(valid, ret, 0.0)
+    mean = x.sum(axis=-1, keepdims=True) / n
+    z = np.where(valid, ret - mean, 0.0)
+    std = np.sqrt((z ** 2).sum(axis=-1, keepdims=True) / n)
+    z = np.divide(z, std, out=np.zeros_like(z), where=std > 0)
+    return z, valid.astype(np.float64)
+
+
+def lagged_correlations(values: np.ndarray, max_lag: int = MAX_LAG) -> np.ndarray:
+    """
+    Korelasi perubahan harian antar pasar untuk setiap lag.
+
+    values : (n_pasar, n_komoditas, n_hari)
+    Return corr (n_pasar, n_pasar, n_komoditas, 2*max_lag+1), dengan
+    corr[i, j, k, max_lag + L] = korelasi pasar i pada hari t dengan pasar j pada hari t+L.
+    """
+    z, v = _standardize(_daily_returns(values))
+    P, K, T = z.shape
+    lags = range(-max_lag, max_lag + 1)
+    corr = np.full((P, P, K, len(lags)), np.nan)
+
+    for li, lag in enumerate(lags):
+        if abs(lag) >= T:
+            continue
+        if lag >= 0:
+            a, b, va, vb = z[..., :T - lag], z[..., lag:], v[..., :T - lag], v[..., lag:]
+        else:
+            a, b, va, vb = z[..., -lag:], z[..., :T + lag], v[..., -lag:], v[..., :T + lag]
+        num = np.einsum("pkt,qkt->pqk", a, b)
+        cnt = np.einsum("pkt,qkt->pqk", va, vb)
+        corr[..., li] = np.where(cnt >= MIN_OVERLAP, num / np.maximum(cnt, 1), np.nan)
+
+    return corr
+
+
+def compare_markets(cube: PriceCube, max_lag: int = MAX_LAG,
+                    window_days: Optional[int] = None) -> pd.DataFrame:
+    """
+    Tabel perbandingan untuk setiap komoditas x pasangan pasar (pasar_a < pasar_b).
+
+    Kolom:
+        komoditas, pasar_a, pasar_b,
+        spread_last      : harga terakhir pasar_a - pasar_b (Rp)
+        spread_pct_last  : spread_last relatif terhadap pasar_b (%)
+        spread_pct_mean  : rata-rata spread % selama periode
+        corr_lag0        : korelasi perubahan harian pada hari yang sama
+        best_lag, best_corr : lag dengan korelasi tertinggi
+        leader           : pasar yang bergerak duluan (atau "serentak")
+    window_days membatasi perhitungan ke N hari terakhir.
+    """
+    values = np.asarray(cube.values, dtype=np.float64)
+    if window_days is not None:
+        values = values[..., -window_days:]
+
+    P, K, _ = values.shape
+    filled = ffill_days(values)
+
+    # Spread semua pasangan sekaligus: (P, P, K, D)
+    spread = filled[:, None] - filled[None, :]
+    base = filled[None, :]
+    spread_pct = np.divide(spread * 100.0, base, out=np.full(spread.shape, np.nan),
+                           where=~np.isnan(base) & (base > 0))
+    valid = ~np.isnan(spread_pct)
+    spread_pct_mean = np.where(valid, spread_pct, 0.0).sum(-1) / np.maximum(valid.sum(-1), 1)
+    spread_pct_mean[valid.sum(-1) == 0] = np.nan
+
+    corr = lagged_correlations(values, max_lag)
+    lags = np.arange(-max_lag, max_lag + 1)
+    has_corr = ~np.isnan(corr).all(axis=-1)
+    best_idx = np.argmax(np.where(np.isnan(corr), -np.inf, corr), axis=-1)
+    best_corr = np.take_along_axis(corr, best_idx[..., None], axis=-1)[..., 0]
+    best_lag = np.where(has_corr, lags[best_idx], 0)
+
+    ia, ib = np.triu_indices(P, k=1)
+    n_pairs = len(ia)
+    pasar = np.asarray(cube.pasar, dtype=object)
+    komoditas = np.asarray(cube.komoditas, dtype=object)
+
+    best_lag_pairs = best_lag[ia, ib].ravel()
+    leader = np.where(
+        best_lag_pairs > 0, np.repeat(pasar[ia], K),
+        np.where(best_lag_pairs < 0, np.repeat(pasar[ib], K), "serentak"),
+    )
+    leader = np.where(has_corr[ia, ib].ravel(), leader, None)
+
+    result = pd.DataFrame({
+        "komoditas": np.tile(komoditas, n_pairs),
+        "pasar_a": np.repeat(pasar[ia], K),
+        "pasar_b": np.repeat(pasar[ib], K),
+        "spread_last": spread[ia, ib, :, -1].ravel(),
+        "spread_pct_last": spread_pct[ia, ib, :, -1].ravel(),
+        "spread_pct_mean": spread_pct_mean[ia, ib].ravel(),
+        "corr_lag0": corr[ia, ib, :, max_lag].ravel(),
+        "best_lag": best_lag_pairs,
+        "best_corr": np.where(has_corr[ia, ib], best_corr[ia, ib], np.nan).ravel(),
+        "leader": leader,
+    })
+    # Buang komoditas yang tidak dijual di salah satu pasar
+    return result.dropna(subset=["spread_pct_mean"]).reset_index(drop=True)
+
+
+def pairs_for(comparison: pd.DataFrame, komoditas: str) -> pd.DataFrame:
+    """Baris perbandingan untuk satu komoditas."""
+    return comparison[comparison["komoditas"] == komoditas].drop(columns=["komoditas"])
@@ -0,0 +1,244 @@
+# model_store.py
+"""
+Penyimpanan bobot model bersama (read-only, memory-mapped) untuk banyak worker server.
+
+Semua model LSTM di artifacts/ punya arsitektur yang sama (LSTM(64) -> Dense(32, relu)
+-> Dense(1)), sehingga bobotnya bisa ditumpuk per nama layer menjadi array
+(n_model, ...) dan disimpan sebagai .npy. Satu proses loader (perintah `export`)
+membaca semua .keras dan menulis store; setiap worker cukup np.load(mmap_mode="r"),
+sehingga halaman memori bobot dibagi lewat page cache OS: memori tumbuh sesuai
+jumlah model, bukan model x worker.
+
+Inferensi memakai forward pass NumPy langsung di atas view memmap (NumpyLSTM),
+dengan antarmuka predict() seperti keras.Model agar bisa dipakai forecast_lstm.
+
+Setiap model di store mencatat versi artefak sumbernya (artifact_version). Pasangan yang
+sudah dilatih ulang setelah export dianggap basi: index_of mengembalikan None dan
+load_artifacts jatuh ke artefak .keras terbaru, sampai store di-export ulang.
+
+Jalankan (sekali, setiap artefak berubah):
+    python model_store.py export
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+import joblib
+import numpy as np
+
+from models_lstm import _artifact_base, _artifact_prefix, artifact_version, list_artifacts, load_artifacts
+
+STORE_DIR = Path("cache") / "model_store"
+CURRENT_FILE = "current.json"
+PARITY_TOL = 1e-4          # selisih maksimum (skala scaler 0..1) NumpyLSTM vs Keras
+PARITY_SAMPLES = 16
+
+# Urutan bobot sesuai _build_lstm_model: LSTM [kernel, recurrent_kernel, bias],
+# Dense(32) [kernel, bias], Dense(1) [kernel, bias]
+WEIGHT_NAMES = [
+    "lstm_kernel", "lstm_recurrent", "lstm_bias",
+    "dense1_kernel", "dense1_bias",
+    "dense2_kernel", "dense2_bias",
+]
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)  # stabil numerik, setara 1/(1+e^-x)
+
+
+def lstm_forward(x: np.ndarray, w: dict) -> np.ndarray:
+    """
+    Forward pass LSTM -> Dense(relu) -> Dense untuk batch x (B, T, 1).
+
+    Bobot w[name] boleh berbentuk per model (tanpa sumbu batch) atau per sampel
+    (dengan sumbu batch di depan, untuk menjalankan banyak model sekaligus).
+    Gerbang mengikuti urutan Keras: input, forget, cell, output.
+    """
+    x = np.asarray(x, dtype=np.float32)
+    B, T, _ = x.shape
+    kernel, recurrent, bias = w["lstm_kernel"], w["lstm_recurrent"], w["lstm_bias"]
+    per_sample = kernel.ndim == 3
+    units = recurrent.shape[-2]
+
+    h = np.zeros((B, units), dtype=np.float32)
+    c = np.zeros((B, units), dtype=np.float32)
+    for t in range(T):
+        if per_sample:
+            z = (np.einsum("bi,bij->bj", x[:, t, :], kernel)
+                 + np.einsum("bu,buj->bj", h, recurrent) + bias)
+        else:
+            z = x[:, t, :] @ kernel + h @ recurrent + bias
+        i = _sigmoid(z[:, :units])
+        f = _sigmoid(z[:, units:2 * units])
+        g = np.tanh(z[:, 2 * units:3 * units])
+        o = _sigmoid(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+
+    if per_sample:
+        d1 = np.maximum(np.einsum("bu,buj->bj", h, w["dense1_kernel"]) + w["dense1_bias"], 0.0)
+        return np.einsum("bu,buj->bj", d1, w["dense2_kernel"]) + w["dense2_bias"]
+    d1 = np.maximum(h @ w["dense1_kernel"] + w["dense1_bias"], 0.0)
+    return d1 @ w["dense2_kernel"] + w["dense2_bias"]
+
+
+class NumpyLSTM:
+    """Model dari store bersama; bobot = view memmap (tanpa salinan per worker)."""
+
+    def __init__(self, weights: dict):
+        self.weights = weights
+
+    def predict(self, x, verbose=0):
+        return lstm_forward(x, self.weights)
+
+
+def check_parity(model, weights: dict, window_size: int, seed: int = 0) -> float:
+    """
+    Bandingkan lstm_forward dengan model.predict Keras pada window acak di rentang
+    scaler (0..1). Return selisih absolut maksimum; urutan gerbang, aktivasi, atau bias
+    yang salah langsung terlihat sebagai selisih besar.
+    """
+    x = np.random.default_rng(seed).uniform(0.0, 1.0, size=(PARITY_SAMPLES, window_size, 1)).astype(np.float32)
+    expected = np.asarray(model.predict(x, verbose=0))
+    return float(np.max(np.abs(lstm_forward(x, weights) - expected)))
+
+
+class ModelStore:
+    """Store bobot yang sudah di-export, dibuka read-only secara memory-mapped."""
+
+    def __init__(self, version_dir: Path):
+        self.version_dir = Path(version_dir)
+        index = json.loads((self.version_dir / "index.json").read_text(encoding="utf-8"))
+        self.window_size = index["window_size"]
+        self.models = index["models"]          # daftar {"base", "pasar", "komoditas", "version", "meta"}
+        self._pos = {m["base"]: i for i, m in enumerate(self.models)}
+        self.weights = {
+            name: np.load(self.version_dir / f"{name}.npy", mmap_mode="r")
+            for name in WEIGHT_NAMES
+        }
+        self._scalers = {}
+
+    def index_of(self, pasar: str, komoditas: str) -> Optional[int]:
+        """Posisi model di store; None jika tidak ada atau artefaknya sudah dilatih ulang."""
+        i = self._pos.get(_artifact_base(pasar, komoditas, self.window_size))
+        if i is None or self.models[i].get("version") != artifact_version(pasar, komoditas, self.window_size):
+            return None
+        return i
+
+    def model_weights(self, i: int) -> dict:
+        return {name: arr[i] for name, arr in self.weights.items()}
+
+    def scaler(self, i: int):
+        if i not in self._scalers:
+            self._scalers[i] = joblib.load(self.version_dir / f"{self.models[i]['base']}.scaler.joblib")
+        return self._scalers[i]
+
+    def load_artifacts(self, pasar: str, komoditas: str, precision: str = "float32"):
+        """
+        Sama seperti models_lstm.load_artifacts, tapi model = NumpyLSTM di atas memmap
+        (selalu float32: store menyimpan bobot asli). precision hanya dipakai untuk
+        pasangan yang tidak ada / basi di store, yang dimuat dari artefak terbaru.
+        """
+        i = self.index_of(pasar, komoditas)
+        if i is None:
+            return load_artifacts(pasar, komoditas, self.window_size, precision=precision)
+        meta = self.models[i]["meta"]
+        return {
+            "model": NumpyLSTM(self.model_weights(i)),
+            "scaler": self.scaler(i),
+            "meta": meta,
+            "mae": meta.get("mae"),
+            "rmse": meta.get("rmse"),
+            "precision": "float32",
+            "dir": str(self.version_dir),
+        }
+
+
+def open_model_store(store_dir: Path = STORE_DIR) -> Optional[ModelStore]:
+    """Buka versi store yang aktif (dari current.json). None jika belum pernah di-export."""
+    current = store_dir / CURRENT_FILE
+    if not current.exists():
+        return None
+    version = json.loads(current.read_text(encoding="utf-8"))["version"]
+    return ModelStore(store_dir / version)
+
+
+def export_model_store(window_size: int = 30, store_dir: Path = STORE_DIR) -> Path:
+    """
+    Proses loader: baca semua model .keras, tumpuk bobotnya per nama, tulis versi baru
+    store lalu alihkan current.json secara atomik. Worker yang sedang memakai versi lama
+    tetap aman karena versi lama tidak ditimpa.
+
+    Setiap model dicek paritasnya (check_parity) terhadap Keras sebelum ditulis; jika ada
+    yang melewati PARITY_TOL, export gagal (ValueError) dan current.json tidak berubah.
+    """
+    import tensorflow as tf
+
+    stacked = {name: [] for name in WEIGHT_NAMES}
+    models = []
+    mismatches = []
+    for pasar, komoditas in list_artifacts(window_size):
+        base = _artifact_base(pasar, komoditas, window_size)
+        version = artifact_version(pasar, komoditas, window_size)
+        prefix = _artifact_prefix(base)  # dibaca sekali: satu set artefak yang konsisten
+        model = tf.keras.models.load_model(f"{prefix}.keras")
+        weights = model.get_weights()
+        if len(weights) != len(WEIGHT_NAMES):
+            print(f"[model_store] Lewati {base}: arsitektur berbeda ({len(weights)} tensor bobot).")
+            continue
+        if models and any(w.shape != stacked[n][0].shape for n, w in zip(WEIGHT_NAMES, weights)):
+            print(f"[model_store] Lewati {base}: ukuran bobot berbeda.")
+            continue
+        diff = check_parity(model, dict(zip(WEIGHT_NAMES, weights)), window_size)
+        if diff > PARITY_TOL:
+            mismatches.append(f"{base} (selisih maks {diff:.2e})")
+            continue
+        for name, w in zip(WEIGHT_NAMES, weights):
+            stacked[name].append(w.astype(np.float32))
+        meta_path = Path(f"{prefix}.meta.json")
+        meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+        models.append({"base": base, "pasar": pasar, "komoditas": komoditas, "version": version,
+                       "meta": meta, "scaler_src": f"{prefix}.scaler.joblib"})
+
+    if mismatches:
+        raise ValueError(
+            f"Forward pass NumPy tidak cocok dengan Keras (toleransi {PARITY_TOL}) untuk: "
+            + ", ".join(mismatches)
+        )
+
+    version = f"v{time.strftime('%Y%m%d%H%M%S')}"
+    version_dir = store_dir / version
+    version_dir.mkdir(parents=True, exist_ok=False)
+    for name in WEIGHT_NAMES:
+        np.save(version_dir / f"{name}.npy", np.stack(stacked[name]) if models else np.empty((0,)))
+    for m in models:
+        (version_dir / f"{m['base']}.scaler.joblib").write_bytes(Path(m.pop("scaler_src")).read_bytes())
+    (version_dir / "index.json").write_text(
+        json.dumps({"window_size": window_size, "models": models}, ensure_ascii=False, indent=2),
+        encoding="utf-8",
+    )
+
+    tmp_current = store_dir / f"{CURRENT_FILE}.{os.getpid()}.tmp"
+    tmp_current.write_text(json.dumps({"version": version}), encoding="utf-8")
+    os.replace(tmp_current, store_dir / CURRENT_FILE)
+    return version_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store bobot model bersama (memory-mapped).")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--window-size", type=int, default=30)
+    args = parser.parse_args()
+
+    version_dir = export_model_store(args.window_size)
+    store = ModelStore(version_dir)
+    size_kb = sum(arr.nbytes for arr in store.weights.values()) / 1024
+    print(f"[model_store] {len(store.models)} model -> {version_dir} ({size_kb:.0f} KB bobot)")
+
+
+if __name__ == "__main__":
+    main()
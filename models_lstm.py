@@ -18,13 +18,24 @@ from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense
 from tensorflow.keras.callbacks import EarlyStopping
 import math
+import os
+import shutil
+import threading
+import time
+from typing import Optional
+
+from utils import align_daily_calendar
 
 
 def _ensure_datetime(df: pd.DataFrame, col: str = "tanggal") -> pd.DataFrame:
     """Pastikan kolom tanggal bertipe datetime dan di-sort naik."""
     if col in df.columns:
-        df[col] = pd.to_datetime(df[col], errors="coerce")
-        df = df.dropna(subset=[col]).sort_values(col)
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        df = df.dropna(subset=[col])
+        # Deret dari price_cube / prepare_price_dataframe sudah urut, tidak perlu sort ulang
+        if not df[col].is_monotonic_increasing:
+            df = df.sort_values(col)
     return df
 
 
@@ -44,23 +55,221 @@ def _create_sequences(series_scaled: np.ndarray, window_size: int):
     return X, y
 
 
-def _build_lstm_model(window_size: int) -> Sequential:
+def _matches(col: pd.Series, value: str) -> pd.Series:
+    """
+    Mask baris yang namanya sama dengan value (dicocokkan uppercase/strip).
+    Untuk kolom categorical, normalisasi cukup dilakukan pada tabel kategori.
+    """
+    target = str(value).upper().strip()
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        names = col.cat.categories.astype(str).str.upper().str.strip()
+        return col.cat.codes.isin(np.flatnonzero(names == target))
+    return col.astype(str).str.upper().str.strip() == target
+
+
+def _select_series(df: pd.DataFrame, komoditas: str, pasar: str) -> pd.DataFrame:
+    """
+    Ambil deret historis satu kombinasi (komoditas, pasar) dari data panjang:
+    nama dicocokkan uppercase/strip, tanggal dirapikan & di-sort, baris tanpa harga dibuang.
+    """
+    # Filter data untuk komoditas & pasar tertentu (tanpa menyalin seluruh frame dulu)
+    df_sub = df[
+        _matches(df["komoditas"], komoditas) & _matches(df["pasar"], pasar)
+    ].copy()
+
+    # Pastikan tanggal rapi
+    df_sub = _ensure_datetime(df_sub, "tanggal")
+
+    # Buang baris tanpa harga
+    return df_sub.dropna(subset=["harga"]).copy()
+
+
+# Kebijakan kalender yang bisa dipakai model: harus menghasilkan deret tanpa NaN,
+# karena baris berurutan diperlakukan sebagai hari berurutan ("none" menyisakan NaN).
+MODEL_FILL_POLICIES = ("ffill", "linear")
+
+
+def artifact_fill(meta: Optional[dict]) -> Optional[str]:
+    """
+    Kebijakan kalender yang dipakai saat artefak dilatih (meta["fill"]).
+    Artefak lama tanpa kunci "fill" dilatih di atas baris observasi apa adanya
+    (hari libur tidak diisi), jadi forecast-nya juga memakai baris observasi (None).
+    """
+    return (meta or {}).get("fill")
+
+
+def _to_daily(df_sub: pd.DataFrame, fill: Optional[str] = "ffill") -> pd.DataFrame:
+    """
+    Selaraskan deret ke kalender harian (lihat utils.align_daily_calendar) supaya
+    baris berurutan = hari berurutan, baik saat membuat sequence maupun saat forecast.
+    Deret yang sudah diselaraskan (punya kolom is_gap) tidak diproses ulang.
+
+    fill=None: tanpa penyelarasan, hanya baris observasi (untuk artefak lama,
+    lihat artifact_fill).
+    """
+    if fill is None:
+        if "is_gap" in df_sub.columns:
+            df_sub = df_sub[~df_sub["is_gap"].astype(bool)]
+        return df_sub.dropna(subset=["harga"])
+    if fill not in MODEL_FILL_POLICIES:
+        raise ValueError(
+            f"fill untuk model harus salah satu dari {MODEL_FILL_POLICIES}, bukan {fill!r} "
+            "(hari kosong tidak boleh tersisa sebagai NaN di dalam window)"
+        )
+    if "is_gap" not in df_sub.columns:
+        missing = [c for c in ("pasar", "komoditas") if c not in df_sub.columns]
+        df_sub = align_daily_calendar(
+            df_sub.assign(**{c: "-" for c in missing}), fill=fill
+        ).drop(columns=missing)
+    return df_sub
+
+
+# Learning rate Adam default untuk batch 16; batch lebih besar diskalakan linear
+BASE_BATCH_SIZE = 16
+BASE_LEARNING_RATE = 1e-3
+VALIDATION_FRACTION = 0.1
+
+
+def configure_cpu_threads(intra_op: Optional[int] = None, inter_op: Optional[int] = None):
+    """
+    Atur thread pool TensorFlow untuk server CPU. Harus dipanggil sebelum operasi TF
+    pertama; None = biarkan default TF.
+    """
+    try:
+        if intra_op:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        if inter_op:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError as e:
+        print(f"[configure_cpu_threads] Runtime TF sudah berjalan, pengaturan thread diabaikan: {e}")
+
+
+def _window_dataset(
+    series_scaled: np.ndarray,
+    window_size: int,
+    start: int,
+    stop: int,
+    batch_size: int,
+    shuffle: bool = False,
+) -> tf.data.Dataset:
+    """
+    tf.data pipeline untuk sequence ke-[start, stop) dari deret ter-scale (n, 1),
+    sama dengan _create_sequences tapi window dibentuk di dalam graph (tanpa
+    menyalin array X berukuran n x window_size di memori).
+    Elemen: x (window_size, 1), y (1,).
+    """
+    segment = series_scaled[start:stop + window_size].astype(np.float32)
+    ds = tf.data.Dataset.from_tensor_slices(segment)
+    ds = ds.window(window_size + 1, shift=1, drop_remainder=True)
+    ds = ds.flat_map(lambda w: w.batch(window_size + 1))
+    ds = ds.map(lambda w: (w[:-1], w[-1]), num_parallel_calls=tf.data.AUTOTUNE)
+    ds = ds.cache()
+    if shuffle:
+        # Setara shuffle=True model.fit: urutan diacak ulang setiap epoch
+        ds = ds.shuffle(stop - start, reshuffle_each_iteration=True)
+    return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def _build_lstm_model(window_size: int, learning_rate: float = BASE_LEARNING_RATE) -> Sequential:
     """Membangun arsitektur LSTM sederhana untuk univariate forecasting."""
     model = Sequential()
     model.add(LSTM(64, return_sequences=False, input_shape=(window_size, 1)))
     model.add(Dense(32, activation="relu"))
     model.add(Dense(1))
 
-    model.compile(optimizer="adam", loss="mse")
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate), loss="mse")
     return model
 
 
+# =========================
+# CHECKPOINT PER EPOCH (training yang bisa dilanjutkan)
+# =========================
+
+CKPT_MODEL = "last.keras"          # model + state optimizer setelah epoch terakhir
+CKPT_BEST = "best.weights.h5"      # bobot terbaik EarlyStopping (restore_best_weights)
+CKPT_STATE = "state.json"          # epoch terakhir + state EarlyStopping
+
+
+def _tmp_path(path: Path) -> Path:
+    """File sementara di folder yang sama (agar os.replace atomik), ekstensi Keras dipertahankan."""
+    for ext in (".weights.h5", ".keras"):
+        if path.name.endswith(ext):
+            return path.with_name(f"{path.name[:-len(ext)]}.{os.getpid()}.tmp{ext}")
+    return path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+
+def _replace_atomic(path: Path, write):
+    """write(tmp_path) lalu os.replace: pembaca hanya pernah melihat file lama atau file utuh."""
+    tmp_path = _tmp_path(path)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _load_checkpoint_state(checkpoint_dir: Path) -> Optional[dict]:
+    state_path = checkpoint_dir / CKPT_STATE
+    if not state_path.exists() or not (checkpoint_dir / CKPT_MODEL).exists():
+        return None
+    return json.loads(state_path.read_text(encoding="utf-8"))
+
+
+class _EpochCheckpoint(tf.keras.callbacks.Callback):
+    """
+    Simpan model, bobot terbaik, dan state EarlyStopping setiap akhir epoch (atomik).
+    Harus diletakkan SETELAH EarlyStopping di daftar callbacks.
+    """
+
+    def __init__(self, checkpoint_dir: Path, early_stopping: EarlyStopping, resume_state: Optional[dict] = None):
+        super().__init__()
+        self.checkpoint_dir = checkpoint_dir
+        self.early_stopping = early_stopping
+        self.resume_state = resume_state
+
+    def on_train_begin(self, logs=None):
+        # EarlyStopping.on_train_begin me-reset state-nya; pulihkan dari checkpoint
+        state, es = self.resume_state, self.early_stopping
+        if state is None:
+            return
+        es.wait = state["wait"]
+        es.best = state["best"]
+        es.best_epoch = state["best_epoch"]
+        best_path = self.checkpoint_dir / CKPT_BEST
+        if es.restore_best_weights and best_path.exists():
+            current = self.model.get_weights()
+            self.model.load_weights(best_path)
+            es.best_weights = self.model.get_weights()
+            self.model.set_weights(current)
+
+    def on_epoch_end(self, epoch, logs=None):
+        es = self.early_stopping
+        if es.best_epoch == epoch:
+            _replace_atomic(self.checkpoint_dir / CKPT_BEST, self.model.save_weights)
+        _replace_atomic(self.checkpoint_dir / CKPT_MODEL, self.model.save)
+        state = {
+            "epoch": epoch,
+            "wait": es.wait,
+            "best": float(es.best),
+            "best_epoch": es.best_epoch,
+            "stopped": bool(self.model.stop_training),
+        }
+        _replace_atomic(
+            self.checkpoint_dir / CKPT_STATE,
+            lambda p: p.write_text(json.dumps(state), encoding="utf-8"),
+        )
+
+
 def train_lstm_for(
     df: pd.DataFrame,
     komoditas: str,
     pasar: str,
     window_size: int = 30,
     epochs: int = 30,
+    fill: str = "ffill",
+    checkpoint_dir: Optional[Path] = None,
+    batch_size: int = BASE_BATCH_SIZE,
 ):
     """
     Melatih model LSTM untuk kombinasi (komoditas, pasar) tertentu.
@@ -78,6 +287,17 @@ def train_lstm_for(
         Banyaknya hari historis yang dipakai sebagai input sequence LSTM.
     epochs : int, default 30
         Jumlah epoch training.
+    fill : str, default "ffill"
+        Cara mengisi hari tanpa data sebelum membuat sequence ("ffill" / "linear",
+        lihat utils.align_daily_calendar). Simpan nilainya di meta.json ("fill") agar
+        forecast memakai kalender yang sama (lihat artifact_fill).
+    checkpoint_dir : Path, opsional
+        Folder checkpoint per epoch. Jika berisi checkpoint dari run sebelumnya yang
+        terhenti, training dilanjutkan dari epoch berikutnya (bobot, optimizer, dan state
+        EarlyStopping dipulihkan). Dipakai oleh train_job.py.
+    batch_size : int, default 16
+        Ukuran batch training. Learning rate diskalakan linear terhadap batch 16
+        (BASE_LEARNING_RATE x batch_size / 16).
 
     Returns
     -------
@@ -87,23 +307,7 @@ def train_lstm_for(
     history : History object (keras)
     metrics : (mae, rmse) pada data test
     """
-    # Filter data untuk komoditas & pasar tertentu
-    df_sub = df.copy()
-    df_sub["komoditas"] = df_sub["komoditas"].astype(str).str.upper().str.strip()
-    df_sub["pasar"] = df_sub["pasar"].astype(str).str.upper().str.strip()
-
-    komo_upper = str(komoditas).upper().strip()
-    pasar_upper = str(pasar).upper().strip()
-
-    df_sub = df_sub[
-        (df_sub["komoditas"] == komo_upper) & (df_sub["pasar"] == pasar_upper)
-    ].copy()
-
-    # Pastikan tanggal rapi
-    df_sub = _ensure_datetime(df_sub, "tanggal")
-
-    # Buang baris tanpa harga
-    df_sub = df_sub.dropna(subset=["harga"]).copy()
+    df_sub = _to_daily(_select_series(df, komoditas, pasar), fill)
 
     if len(df_sub) <= window_size + 5:
         print(
@@ -119,17 +323,30 @@ def train_lstm_for(
     scaler = MinMaxScaler(feature_range=(0, 1))
     values_scaled = scaler.fit_transform(values)
 
-    # Buat sequence
-    X, y = _create_sequences(values_scaled, window_size)
+    # Train-test split (80% train, 20% test) atas indeks sequence; 10% terakhir
+    # bagian train jadi validasi (sama seperti validation_split=0.1 sebelumnya)
+    n_seq = len(values_scaled) - window_size
+    split_idx = int(n_seq * 0.8)
+    val_idx = int(math.floor(split_idx * (1.0 - VALIDATION_FRACTION)))
 
-    # Train-test split (80% train, 20% test)
-    split_idx = int(len(X) * 0.8)
-    X_train, y_train = X[:split_idx], y[:split_idx]
-    X_test, y_test = X[split_idx:], y[split_idx:]
+    train_ds = _window_dataset(values_scaled, window_size, 0, val_idx, batch_size, shuffle=True)
+    val_ds = _window_dataset(values_scaled, window_size, val_idx, split_idx, batch_size)
+    # Data test kecil & dipakai sekali: cukup sequence NumPy biasa
+    X_test, y_test = _create_sequences(values_scaled[split_idx:], window_size)
 
-    # Bangun model
+    # Bangun model (atau lanjutkan dari checkpoint)
     tf.keras.backend.clear_session()
-    model = _build_lstm_model(window_size)
+    resume_state = None
+    if checkpoint_dir is not None:
+        checkpoint_dir = Path(checkpoint_dir)
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        resume_state = _load_checkpoint_state(checkpoint_dir)
+    if resume_state is not None:
+        model = tf.keras.models.load_model(checkpoint_dir / CKPT_MODEL)
+        initial_epoch = resume_state["epoch"] + 1
+    else:
+        model = _build_lstm_model(window_size, BASE_LEARNING_RATE * batch_size / BASE_BATCH_SIZE)
+        initial_epoch = 0
 
     # Early stopping biar tidak overfitting
     es = EarlyStopping(
@@ -139,15 +356,24 @@ def train_lstm_for(
         verbose=0,
     )
 
-    history = model.fit(
-        X_train,
-        y_train,
-        epochs=epochs,
-        batch_size=16,
-        validation_split=0.1,
-        callbacks=[es],
-        verbose=0,
-    )
+    callbacks = [es]
+    if checkpoint_dir is not None:
+        callbacks.append(_EpochCheckpoint(checkpoint_dir, es, resume_state))
+
+    if resume_state is not None and (resume_state["stopped"] or initial_epoch >= epochs):
+        # Training sudah selesai sebelum proses terhenti: cukup pulihkan bobot terbaik
+        history = None
+        if (checkpoint_dir / CKPT_BEST).exists():
+            model.load_weights(checkpoint_dir / CKPT_BEST)
+    else:
+        history = model.fit(
+            train_ds,
+            validation_data=val_ds,
+            epochs=epochs,
+            initial_epoch=initial_epoch,
+            callbacks=callbacks,
+            verbose=0,
+        )
 
     # Evaluasi di data test
     y_pred_test_scaled = model.predict(X_test, verbose=0)
@@ -161,12 +387,43 @@ def train_lstm_for(
     return model, scaler, df_sub, history, (mae, rmse)
 
 
+def _rollout(model, windows_scaled: np.ndarray, n_days: int) -> np.ndarray:
+    """
+    Prediksi autoregresif untuk banyak window sekaligus.
+    windows_scaled (S, window_size) -> prediksi (S, n_days), masih dalam skala scaler.
+    Setiap langkah = satu model.predict untuk seluruh S window.
+    """
+    n_windows, window_size = windows_scaled.shape
+    buf = np.empty((n_windows, window_size + n_days), dtype=np.float32)
+    buf[:, :window_size] = windows_scaled
+    for t in range(n_days):
+        # Window bergeser satu langkah; prediksi baru jadi nilai terakhir window berikutnya
+        x = buf[:, t:t + window_size].reshape(n_windows, window_size, 1)
+        buf[:, window_size + t] = np.asarray(model.predict(x, verbose=0)).reshape(n_windows)
+    return buf[:, window_size:]
+
+
+def forecast_lstm_batch(model, scaler: MinMaxScaler, windows: np.ndarray, n_days: int = 30) -> np.ndarray:
+    """
+    Forecast n hari ke depan untuk banyak window harga (satuan Rp) dalam satu rollout batch.
+
+    windows : array (S, window_size) harga historis / skenario, urut tanggal
+    Return array (S, n_days) prediksi dalam Rp.
+    """
+    windows = np.asarray(windows, dtype=np.float64)
+    n_windows, window_size = windows.shape
+    windows_scaled = scaler.transform(windows.reshape(-1, 1)).reshape(n_windows, window_size)
+    preds_scaled = _rollout(model, windows_scaled, n_days)
+    return scaler.inverse_transform(preds_scaled.reshape(-1, 1)).reshape(n_windows, n_days)
+
+
 def forecast_lstm(
     model,
     scaler: MinMaxScaler,
     df_sub: pd.DataFrame,
     n_days: int = 30,
     window_size: int = 30,
+    fill: str = "ffill",
 ) -> pd.DataFrame:
     """
     Membuat prediksi n hari ke depan untuk kombinasi (komoditas, pasar) tertentu,
@@ -185,6 +442,9 @@ def forecast_lstm(
         Banyaknya hari yang ingin diprediksi ke depan.
     window_size : int, default 30
         Window historis yang dipakai seperti saat training.
+    fill : str atau None, default "ffill"
+        Cara mengisi hari tanpa data, sama seperti saat training
+        (artifact_fill(meta); None untuk artefak lama tanpa penyelarasan kalender).
 
     Returns
     -------
@@ -196,7 +456,7 @@ def forecast_lstm(
         return pd.DataFrame(columns=["tanggal", "prediksi"])
 
     df_sub = _ensure_datetime(df_sub, "tanggal")
-    df_sub = df_sub.dropna(subset=["harga"]).copy()
+    df_sub = _to_daily(df_sub.dropna(subset=["harga"]), fill)
     values = df_sub["harga"].values.reshape(-1, 1)
     values_scaled = scaler.transform(values)
 
@@ -205,20 +465,8 @@ def forecast_lstm(
         return pd.DataFrame(columns=["tanggal", "prediksi"])
 
     # Ambil window terakhir
-    last_window = values_scaled[-window_size:].copy().reshape(1, window_size, 1)
-
-    preds_scaled = []
-    current_window = last_window
-
-    for _ in range(n_days):
-        next_scaled = model.predict(current_window, verbose=0)[0, 0]
-        preds_scaled.append(next_scaled)
-
-        # Update window: geser satu langkah, tambahkan prediksi baru
-        new_window = np.append(current_window[0, 1:, 0], next_scaled)
-        current_window = new_window.reshape(1, window_size, 1)
-
-    preds_scaled = np.array(preds_scaled).reshape(-1, 1)
+    last_window = values_scaled[-window_size:].reshape(1, window_size)
+    preds_scaled = _rollout(model, last_window, n_days).reshape(-1, 1)
     preds_inv = scaler.inverse_transform(preds_scaled).ravel()
 
     # Buat tanggal prediksi mulai dari tanggal terakhir + 1 hari
@@ -246,43 +494,122 @@ def _slug(s: str) -> str:
 def _artifact_base(pasar: str, komoditas: str, window_size: int) -> str:
     return f"{_slug(pasar)}__{_slug(komoditas)}__WS{int(window_size)}"
 
+VERSIONS_DIR = ARTIFACT_DIR / "versions"
+POINTER_SUFFIX = ".current.json"
+KEEP_VERSIONS = 2          # versi lama disimpan sebentar untuk pembaca yang masih membukanya
+
+
+def _pointer_path(base: str) -> Path:
+    return ARTIFACT_DIR / f"{base}{POINTER_SUFFIX}"
+
+
+def _artifact_prefix(base: str) -> Path:
+    """
+    Prefix path artefak aktif satu pasangan; file-nya = <prefix>.keras / .scaler.joblib /
+    .meta.json / .<fp16|int8>.tflite.
+
+    - Artefak hasil save_artifacts: artifacts/versions/<base>/<versi>/model, dengan versi
+      aktif ditunjuk artifacts/<base>.current.json.
+    - Artefak lama (tanpa pointer): file datar artifacts/<base>.*
+    """
+    pointer = _pointer_path(base)
+    if pointer.exists():
+        version = json.loads(pointer.read_text(encoding="utf-8"))["version"]
+        return VERSIONS_DIR / base / version / "model"
+    return ARTIFACT_DIR / base
+
+
+def artifact_version(pasar: str, komoditas: str, window_size: int) -> Optional[str]:
+    """
+    Identitas versi artefak aktif (berubah setiap kali pasangan dilatih ulang).
+    Dipakai model_store untuk mengenali bobot yang sudah basi. None jika tidak ada.
+    """
+    base = _artifact_base(pasar, komoditas, window_size)
+    pointer = _pointer_path(base)
+    if pointer.exists():
+        return json.loads(pointer.read_text(encoding="utf-8"))["version"]
+    model_path = ARTIFACT_DIR / f"{base}.keras"
+    return f"mtime:{model_path.stat().st_mtime}" if model_path.exists() else None
+
+
+def _prune_versions(base: str, current: str, keep: int = KEEP_VERSIONS):
+    versions = sorted(
+        p for p in (VERSIONS_DIR / base).iterdir()
+        if p.is_dir() and p.name != current and not p.name.endswith(".tmp")  # .tmp = writer lain
+    )
+    for old in versions[:max(len(versions) - (keep - 1), 0)]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
 def save_artifacts(model, scaler, meta: dict, pasar: str, komoditas: str, window_size: int):
     """
     Simpan:
       - model.keras
       - scaler.joblib
       - meta.json
+
+    Ketiganya ditulis ke folder versi baru (artifacts/versions/<base>/<versi>/), lalu
+    pointer <base>.current.json dialihkan secara atomik (os.replace). Pembaca selalu
+    melihat set lama atau set baru secara utuh, tidak pernah model baru + scaler lama.
+    Varian .tflite milik versi lama otomatis tidak terpakai lagi (ikut versi);
+    jalankan export_quantized_artifacts lagi untuk versi baru.
     """
-    ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
     base = _artifact_base(pasar, komoditas, window_size)
+    version = f"v{time.strftime('%Y%m%d%H%M%S')}_{os.getpid()}"
+    version_dir = VERSIONS_DIR / base / version
+    tmp_dir = version_dir.with_name(f"{version}.tmp")
+    tmp_dir.mkdir(parents=True, exist_ok=False)
+
+    try:
+        model.save(tmp_dir / "model.keras")                     # <-- model.keras
+        joblib.dump(scaler, tmp_dir / "model.scaler.joblib")    # <-- scaler.joblib
+        (tmp_dir / "model.meta.json").write_text(
+            json.dumps(meta or {}, ensure_ascii=False, indent=2),
+            encoding="utf-8"
+        )
+        os.replace(tmp_dir, version_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
 
-    model_path = ARTIFACT_DIR / f"{base}.keras"
-    scaler_path = ARTIFACT_DIR / f"{base}.scaler.joblib"
-    meta_path = ARTIFACT_DIR / f"{base}.meta.json"
-
-    model.save(model_path)                 # <-- model.keras
-    joblib.dump(scaler, scaler_path)       # <-- scaler.joblib
-    meta_path.write_text(
-        json.dumps(meta or {}, ensure_ascii=False, indent=2),
-        encoding="utf-8"
-    )
+    _replace_atomic(_pointer_path(base), lambda p: p.write_text(
+        json.dumps({"version": version}), encoding="utf-8"
+    ))
+    _prune_versions(base, version)
 
-    return {"model_path": str(model_path), "scaler_path": str(scaler_path), "meta_path": str(meta_path)}
+    prefix = version_dir / "model"
+    return {
+        "model_path": f"{prefix}.keras",
+        "scaler_path": f"{prefix}.scaler.joblib",
+        "meta_path": f"{prefix}.meta.json",
+        "version": version,
+    }
 
-def load_artifacts(pasar: str, komoditas: str, window_size: int):
+def load_artifacts(pasar: str, komoditas: str, window_size: int, precision: str = "float32"):
     """
     Load artefak. Return dict atau None jika tidak ada.
+
+    precision : "float32" (model .keras asli), "float16" atau "int8"
+        (varian .tflite hasil export_quantized_artifacts). Kalau varian yang diminta
+        belum di-export, atau lebih tua dari .keras-nya (model sudah dilatih ulang),
+        otomatis jatuh kembali ke model float32.
     """
     base = _artifact_base(pasar, komoditas, window_size)
+    prefix = _artifact_prefix(base)
 
-    model_path = ARTIFACT_DIR / f"{base}.keras"
-    scaler_path = ARTIFACT_DIR / f"{base}.scaler.joblib"
-    meta_path = ARTIFACT_DIR / f"{base}.meta.json"
+    model_path = Path(f"{prefix}.keras")
+    scaler_path = Path(f"{prefix}.scaler.joblib")
+    meta_path = Path(f"{prefix}.meta.json")
 
     if not model_path.exists() or not scaler_path.exists():
         return None
 
-    model = tf.keras.models.load_model(model_path)
+    quant_path = _quantized_path(prefix, precision) if precision != "float32" else None
+    if (quant_path is not None and quant_path.exists()
+            and quant_path.stat().st_mtime >= model_path.stat().st_mtime):
+        model = TFLiteModel(quant_path)
+    else:
+        model = tf.keras.models.load_model(model_path)
+        precision = "float32"
     scaler = joblib.load(scaler_path)
     meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
 
@@ -293,5 +620,174 @@ def load_artifacts(pasar: str, komoditas: str, window_size: int):
         "meta": meta,
         "mae": meta.get("mae"),
         "rmse": meta.get("rmse"),
-        "dir": str(ARTIFACT_DIR),
+        "precision": precision,
+        "dir": str(prefix.parent),
+    }
+
+
+def read_meta(pasar: str, komoditas: str, window_size: int) -> dict:
+    """meta.json artefak aktif satu pasangan ({} jika tidak ada)."""
+    meta_path = Path(f"{_artifact_prefix(_artifact_base(pasar, komoditas, window_size))}.meta.json")
+    if not meta_path.exists():
+        return {}
+    return json.loads(meta_path.read_text(encoding="utf-8"))
+
+
+def list_artifacts(window_size: int = 30):
+    """
+    Daftar kombinasi (pasar, komoditas) yang punya artefak untuk window_size tertentu,
+    dibaca dari meta.json artefak aktif (pointer versi atau file datar lama).
+    """
+    suffixes = (POINTER_SUFFIX, ".meta.json")
+    bases = {
+        path.name[:-len(suffix)]
+        for suffix in suffixes
+        for path in ARTIFACT_DIR.glob(f"*__WS{int(window_size)}{suffix}")
     }
+    pairs = []
+    for base in sorted(bases):
+        meta_path = Path(f"{_artifact_prefix(base)}.meta.json")
+        if not meta_path.exists():
+            continue
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("pasar") and meta.get("komoditas"):
+            pairs.append((meta["pasar"], meta["komoditas"]))
+    return pairs
+
+
+# =========================
+# KUANTISASI BOBOT (float16 / int8 via TFLite)
+# =========================
+
+QUANT_SUFFIX = {"float16": "fp16", "int8": "int8"}
+
+
+def _quantized_path(prefix: Path, precision: str) -> Path:
+    """Varian .tflite di samping .keras artefak (prefix dari _artifact_prefix)."""
+    if precision not in QUANT_SUFFIX:
+        raise ValueError(f"precision harus salah satu dari float32/{'/'.join(QUANT_SUFFIX)}, bukan {precision!r}")
+    return Path(f"{prefix}.{QUANT_SUFFIX[precision]}.tflite")
+
+
+class TFLiteModel:
+    """
+    Pembungkus interpreter TFLite dengan antarmuka predict() seperti keras.Model,
+    sehingga bisa langsung dipakai forecast_lstm tanpa perubahan.
+    """
+
+    def __init__(self, model_path):
+        self.model_path = str(model_path)
+        self._interpreter = tf.lite.Interpreter(model_path=self.model_path)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        # Interpreter TFLite tidak thread-safe; forecast bisa datang dari beberapa sesi/thread
+        self._lock = threading.Lock()
+
+    def predict(self, x, verbose=0):
+        x = np.asarray(x, dtype=np.float32)
+        with self._lock:
+            return self._predict(x)
+
+    def _predict(self, x):
+        if tuple(self._input["shape"]) != x.shape:
+            self._interpreter.resize_tensor_input(self._input["index"], x.shape)
+            self._interpreter.allocate_tensors()
+            self._input = self._interpreter.get_input_details()[0]
+            self._output = self._interpreter.get_output_details()[0]
+        self._interpreter.set_tensor(self._input["index"], x)
+        self._interpreter.invoke()
+        return self._interpreter.get_tensor(self._output["index"]).copy()
+
+
+def _convert_to_tflite(model, window_size: int, precision: str) -> bytes:
+    """Konversi model keras float32 ke flatbuffer TFLite dengan presisi tertentu."""
+    fn = tf.function(lambda x: model(x, training=False))
+    concrete = fn.get_concrete_function(tf.TensorSpec([None, window_size, 1], tf.float32))
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete], model)
+    converter.target_spec.supported_ops = [
+        tf.lite.OpsSet.TFLITE_BUILTINS,
+        tf.lite.OpsSet.SELECT_TF_OPS,
+    ]
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if precision == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    # precision == "int8": dynamic range quantization (bobot int8, aktivasi float)
+    return converter.convert()
+
+
+def export_quantized_artifacts(pasar: str, komoditas: str, window_size: int,
+                               precisions=("float16", "int8")):
+    """
+    Buat varian float16 / int8 dari model .keras yang sudah tersimpan.
+    Return dict {precision: path} atau None jika model float32 tidak ada.
+    """
+    prefix = _artifact_prefix(_artifact_base(pasar, komoditas, window_size))
+    model_path = Path(f"{prefix}.keras")
+    if not model_path.exists():
+        return None
+
+    model = tf.keras.models.load_model(model_path)
+    paths = {}
+    for precision in precisions:
+        out_path = _quantized_path(prefix, precision)
+        flatbuffer = _convert_to_tflite(model, window_size, precision)
+        _replace_atomic(out_path, lambda p: p.write_bytes(flatbuffer))
+        paths[precision] = str(out_path)
+    return paths
+
+
+def quantization_report(df: pd.DataFrame, window_size: int = 30,
+                        precisions=("float16", "int8")) -> pd.DataFrame:
+    """
+    Bandingkan akurasi varian terkuantisasi terhadap model float32 asli
+    pada data held-out (20% sequence terakhir, sama seperti split di train_lstm_for).
+
+    Kolom: pasar, komoditas, precision, size_kb, mae, mae_float32, delta_mae, max_abs_diff
+    """
+    df_daily = align_daily_calendar(df)  # sekali untuk semua deret (kebijakan ffill)
+    rows = []
+    for pasar, komoditas in list_artifacts(window_size):
+        prefix = _artifact_prefix(_artifact_base(pasar, komoditas, window_size))
+        ref = load_artifacts(pasar, komoditas, window_size)
+        if ref is None:
+            continue
+        # Pakai kalender yang sama seperti saat artefak dilatih
+        fill = artifact_fill(ref["meta"])
+        source = df_daily if fill in (None, "ffill") else df
+        df_sub = _to_daily(_select_series(source, komoditas, pasar), fill)
+        if len(df_sub) <= window_size + 5:
+            continue
+
+        scaler = ref["scaler"]
+        values_scaled = scaler.transform(df_sub["harga"].values.reshape(-1, 1))
+        X, y = _create_sequences(values_scaled, window_size)
+        split_idx = int(len(X) * 0.8)
+        X_test, y_test = X[split_idx:], y[split_idx:]
+        y_test_inv = scaler.inverse_transform(y_test.reshape(-1, 1)).ravel()
+
+        pred_ref = scaler.inverse_transform(ref["model"].predict(X_test, verbose=0)).ravel()
+        mae_ref = mean_absolute_error(y_test_inv, pred_ref)
+        rows.append({
+            "pasar": pasar, "komoditas": komoditas, "precision": "float32",
+            "size_kb": Path(f"{prefix}.keras").stat().st_size / 1024,
+            "mae": mae_ref, "mae_float32": mae_ref, "delta_mae": 0.0, "max_abs_diff": 0.0,
+        })
+
+        for precision in precisions:
+            quant_path = _quantized_path(prefix, precision)
+            if not quant_path.exists() or quant_path.stat().st_mtime < Path(f"{prefix}.keras").stat().st_mtime:
+                continue  # belum di-export / basi (model sudah dilatih ulang)
+            pred_q = scaler.inverse_transform(
+                TFLiteModel(quant_path).predict(X_test, verbose=0)
+            ).ravel()
+            mae_q = mean_absolute_error(y_test_inv, pred_q)
+            rows.append({
+                "pasar": pasar, "komoditas": komoditas, "precision": precision,
+                "size_kb": quant_path.stat().st_size / 1024,
+                "mae": mae_q, "mae_float32": mae_ref, "delta_mae": mae_q - mae_ref,
+                "max_abs_diff": float(np.max(np.abs(pred_q - pred_ref))),
+            })
+
+    return pd.DataFrame(rows)
@@ -0,0 +1,129 @@
+# prewarm.py
+"""
+Pemanasan (pre-warm) model & forecast di background.
+
+Saat pasar dipilih (dan saat server start, untuk pasar default halaman; lihat
+get_warmer di app.py), artefak semua komoditas pasar itu di-load dan forecast horizon
+maksimumnya dihitung paralel di thread pool. Ketika pengguna lalu memilih komoditas,
+bagian detail tinggal mengambil hasil yang sudah jadi atau menunggu task yang sedang
+berjalan. Komoditas yang masih antre (belum mulai) tidak ditunggu: task-nya dibatalkan
+dan forecast dihitung langsung di thread pemanggil, jadi klik pertama tidak pernah
+lebih lambat dari forecast sinkron biasa.
+
+Dipakai di app.py dengan:
+    from prewarm import ForecastWarmer
+"""
+
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+import pandas as pd
+
+from models_lstm import artifact_fill, forecast_lstm, load_artifacts
+
+
+class ForecastWarmer:
+    """
+    Cache artefak + forecast per (pasar, komoditas) di level proses, diisi oleh thread pool.
+
+    series_fn(pasar, komoditas) -> DataFrame riwayat ['tanggal', 'harga', ...]
+    load_fn(pasar, komoditas)   -> dict artefak / None; default models_lstm.load_artifacts
+                                   (mis. ModelStore.load_artifacts untuk bobot bersama)
+    """
+
+    def __init__(
+        self,
+        series_fn: Callable[[str, str], pd.DataFrame],
+        window_size: int = 30,
+        precision: str = "float32",
+        horizon: int = 60,
+        max_workers: int = 4,
+        load_fn: Optional[Callable[[str, str], Optional[dict]]] = None,
+    ):
+        self.series_fn = series_fn
+        self.load_fn = load_fn
+        self.window_size = window_size
+        self.precision = precision
+        self.horizon = horizon
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prewarm")
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._artifacts = {}
+        self._forecasts = {}
+
+    # ---------- artefak (satu kali load per pasangan) ----------
+
+    def artifacts(self, pasar: str, komoditas: str):
+        """Artefak pasangan (dict load_artifacts / None); di-load sekali, aman antar thread."""
+        key = (pasar, komoditas)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self._artifacts:
+                if self.load_fn is not None:
+                    self._artifacts[key] = self.load_fn(pasar, komoditas)
+                else:
+                    self._artifacts[key] = load_artifacts(
+                        pasar, komoditas, self.window_size, precision=self.precision
+                    )
+            return self._artifacts[key]
+
+    # ---------- forecast horizon maksimum ----------
+
+    def _compute_forecast(self, pasar: str, komoditas: str):
+        loaded = self.artifacts(pasar, komoditas)
+        if loaded is None:
+            return None
+        return forecast_lstm(
+            model=loaded["model"],
+            scaler=loaded["scaler"],
+            df_sub=self.series_fn(pasar, komoditas),
+            n_days=self.horizon,
+            window_size=self.window_size,
+            fill=artifact_fill(loaded["meta"]),
+        )
+
+    def _forecast_future(self, pasar: str, komoditas: str) -> Future:
+        key = (pasar, komoditas)
+        with self._lock:
+            fut = self._forecasts.get(key)
+            # Task yang gagal dicoba ulang pada permintaan berikutnya
+            if fut is None or fut.cancelled() or (fut.done() and fut.exception() is not None):
+                fut = self._executor.submit(self._compute_forecast, pasar, komoditas)
+                self._forecasts[key] = fut
+            return fut
+
+    def forecast(self, pasar: str, komoditas: str):
+        """
+        Forecast horizon maksimum. Task background yang sedang berjalan ditunggu;
+        task yang masih antre diambil alih dan dihitung langsung di thread ini.
+        """
+        key = (pasar, komoditas)
+        while True:
+            fut = self._forecast_future(pasar, komoditas)
+            with self._lock:
+                claimed = self._forecasts.get(key) is fut and fut.cancel()
+                if claimed:
+                    # Pengganti yang sudah "running": pemanggil lain menunggu hasil dari sini
+                    fut = Future()
+                    fut.set_running_or_notify_cancel()
+                    self._forecasts[key] = fut
+            if claimed:
+                try:
+                    fut.set_result(self._compute_forecast(pasar, komoditas))
+                except Exception as e:
+                    fut.set_exception(e)
+            try:
+                return fut.result()
+            except CancelledError:
+                continue  # diambil alih thread lain sebelum sempat jalan; tunggu penggantinya
+
+    def warm_market(self, pasar: str, komoditas_list: Iterable[str]):
+        """Jadwalkan load + forecast semua komoditas satu pasar (idempoten, tidak menunggu)."""
+        for komoditas in komoditas_list:
+            self._forecast_future(pasar, komoditas)
+
+    def is_warm(self, pasar: str, komoditas: str) -> bool:
+        fut = self._forecasts.get((pasar, komoditas))
+        return fut is not None and fut.done() and not fut.cancelled() and fut.exception() is None
@@ -0,0 +1,226 @@
+# price_cube.py
+"""
+Kubus harga padat [pasar x komoditas x hari] di atas kalender harian yang kontinu.
+
+Data panjang (tanggal, komoditas, pasar, harga) diubah sekali menjadi array float32
+lalu disimpan sebagai .npy yang di-memory-map, sehingga:
+- ambil deret satu (pasar, komoditas) atau harga semua komoditas pada satu hari
+  cukup berupa slice tanpa copy (O(1), tanpa filter / sort ulang),
+- beberapa proses worker berbagi satu salinan data lewat page cache OS,
+- hari tanpa data (libur / kosong) tetap punya slot dan bernilai NaN.
+
+Dipakai di app.py dengan:
+    from price_cube import get_price_cube
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+CUBE_DIR = Path("cache")
+CUBE_NAME = "price_cube"
+
+
+class PriceCube:
+    """
+    Kubus harga float32 berukuran (n_pasar, n_komoditas, n_hari) + tabel kode.
+
+    values[p, k, d] = harga pasar ke-p, komoditas ke-k, pada dates[d]; NaN jika kosong.
+    """
+
+    def __init__(self, values: np.ndarray, pasar: List[str], komoditas: List[str],
+                 start_date, source_mtime: Optional[float] = None, fingerprint: Optional[str] = None):
+        self.values = values
+        self.source_mtime = source_mtime
+        self.fingerprint = fingerprint
+        self.pasar = list(pasar)
+        self.komoditas = list(komoditas)
+        self.dates = pd.date_range(start=pd.Timestamp(start_date), periods=values.shape[2], freq="D")
+        self._pasar_idx = {p: i for i, p in enumerate(self.pasar)}
+        self._komoditas_idx = {k: i for i, k in enumerate(self.komoditas)}
+
+    # ---------- indeks ----------
+
+    def pasar_code(self, pasar: str) -> int:
+        return self._pasar_idx[str(pasar).strip().upper()]
+
+    def komoditas_code(self, komoditas: str) -> int:
+        return self._komoditas_idx[str(komoditas).strip().upper()]
+
+    def day_index(self, tanggal) -> Optional[int]:
+        """Posisi tanggal di sumbu hari, None jika di luar kalender kubus."""
+        d = (pd.Timestamp(tanggal).normalize() - self.dates[0]).days
+        if 0 <= d < len(self.dates):
+            return d
+        return None
+
+    # ---------- slice tanpa copy ----------
+
+    def series(self, pasar: str, komoditas: str) -> np.ndarray:
+        """Deret harian (n_hari,) satu (pasar, komoditas); view, bukan copy."""
+        return self.values[self.pasar_code(pasar), self.komoditas_code(komoditas)]
+
+    def day(self, tanggal) -> Optional[np.ndarray]:
+        """Matriks (n_pasar, n_komoditas) harga pada satu tanggal; view, bukan copy."""
+        d = self.day_index(tanggal)
+        return None if d is None else self.values[:, :, d]
+
+    # ---------- ringkasan ----------
+
+    def komoditas_for(self, pasar: str) -> List[str]:
+        """Komoditas yang pernah punya harga di pasar tertentu."""
+        has_data = ~np.isnan(self.values[self.pasar_code(pasar)]).all(axis=1)
+        return [k for k, ok in zip(self.komoditas, has_data) if ok]
+
+    def date_bounds(self, pasar: str):
+        """(tanggal pertama, tanggal terakhir) yang punya harga di pasar tertentu."""
+        has_data = ~np.isnan(self.values[self.pasar_code(pasar)]).all(axis=0)
+        idx = np.flatnonzero(has_data)
+        if idx.size == 0:
+            return None, None
+        return self.dates[idx[0]], self.dates[idx[-1]]
+
+    # ---------- kompatibilitas dengan kode berbasis DataFrame ----------
+
+    def series_frame(self, pasar: str, komoditas: str) -> pd.DataFrame:
+        """
+        Deret (pasar, komoditas) sebagai DataFrame ['tanggal','komoditas','pasar','harga'],
+        hanya hari yang punya harga, sudah urut tanggal.
+        """
+        values = self.series(pasar, komoditas)
+        mask = ~np.isnan(values)
+        return pd.DataFrame({
+            "tanggal": self.dates[mask],
+            "komoditas": self.komoditas[self.komoditas_code(komoditas)],
+            "pasar": self.pasar[self.pasar_code(pasar)],
+            "harga": values[mask],
+        })
+
+    def day_frame(self, pasar: str, tanggal) -> pd.DataFrame:
+        """Harga semua komoditas satu pasar pada satu tanggal: ['komoditas','harga']."""
+        day = self.day(tanggal)
+        if day is None:
+            return pd.DataFrame(columns=["komoditas", "harga"])
+        values = day[self.pasar_code(pasar)]
+        mask = ~np.isnan(values)
+        return pd.DataFrame({
+            "komoditas": [k for k, ok in zip(self.komoditas, mask) if ok],
+            "harga": values[mask],
+        })
+
+
+def ffill_days(values: np.ndarray) -> np.ndarray:
+    """
+    Forward-fill NaN sepanjang sumbu hari (sumbu terakhir) untuk seluruh array sekaligus.
+    NaN sebelum observasi pertama tetap NaN. Mengembalikan array baru.
+    """
+    values = np.asarray(values)
+    idx = np.where(~np.isnan(values), np.arange(values.shape[-1]), 0)
+    np.maximum.accumulate(idx, axis=-1, out=idx)
+    return np.take_along_axis(values, idx, axis=-1)
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Sidik jari isi frame (tanggal, komoditas, pasar, harga). Menjadi key cache kubus,
+    jadi perubahan preprocessing / karantina (mis. threshold detektor) ikut memicu
+    rebuild walau mtime CSV tidak berubah.
+    """
+    hashed = pd.util.hash_pandas_object(df[["tanggal", "komoditas", "pasar", "harga"]], index=False)
+    return hashlib.sha1(hashed.to_numpy().tobytes()).hexdigest()
+
+
+def build_price_cube(df: pd.DataFrame, out_path: Optional[Path] = None) -> PriceCube:
+    """
+    Bangun kubus dari data panjang hasil prepare_price_dataframe.
+    Jika out_path diberikan, array langsung ditulis ke file .npy (tanpa salinan kedua di RAM).
+    Duplikat (tanggal, komoditas, pasar) -> nilai terakhir yang dipakai.
+    """
+    tanggal = pd.to_datetime(df["tanggal"]).dt.normalize()
+    pasar_codes, pasar = pd.factorize(df["pasar"].astype(str), sort=True)
+    komo_codes, komoditas = pd.factorize(df["komoditas"].astype(str), sort=True)
+
+    start = tanggal.min()
+    n_days = int((tanggal.max() - start).days) + 1
+    day_codes = (tanggal - start).dt.days.to_numpy()
+
+    shape = (len(pasar), len(komoditas), n_days)
+    if out_path is not None:
+        values = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float32, shape=shape)
+        values[:] = np.nan
+    else:
+        values = np.full(shape, np.nan, dtype=np.float32)
+
+    values[pasar_codes, komo_codes, day_codes] = df["harga"].to_numpy(dtype=np.float32)
+
+    if out_path is not None:
+        values.flush()
+    return PriceCube(values, pasar.tolist(), komoditas.tolist(), start)
+
+
+def save_price_cube(df: pd.DataFrame, source_path: str, cube_dir: Path = CUBE_DIR,
+                    fingerprint: Optional[str] = None) -> None:
+    """
+    Bangun kubus, tulis <cube_dir>/price_cube.npy + price_cube.codes.json.
+    Ditulis ke file sementara lalu os.replace, supaya worker lain tidak pernah
+    membaca file setengah jadi.
+    """
+    cube_dir.mkdir(parents=True, exist_ok=True)
+    npy_path = cube_dir / f"{CUBE_NAME}.npy"
+    codes_path = cube_dir / f"{CUBE_NAME}.codes.json"
+    tmp_suffix = f".{os.getpid()}.tmp"
+
+    cube = build_price_cube(df, out_path=npy_path.with_name(npy_path.name + tmp_suffix))
+    tmp_codes = codes_path.with_name(codes_path.name + tmp_suffix)
+    tmp_codes.write_text(
+        json.dumps({
+            "pasar": cube.pasar,
+            "komoditas": cube.komoditas,
+            "start_date": str(cube.dates[0].date()),
+            "n_days": len(cube.dates),
+            "source": str(source_path),
+            "source_mtime": Path(source_path).stat().st_mtime,
+            "fingerprint": fingerprint or frame_fingerprint(df),
+        }, ensure_ascii=False, indent=2),
+        encoding="utf-8",
+    )
+    del cube.values  # tutup memmap sebelum file dipindah
+    os.replace(npy_path.with_name(npy_path.name + tmp_suffix), npy_path)
+    os.replace(tmp_codes, codes_path)
+
+
+def load_price_cube(cube_dir: Path = CUBE_DIR) -> Optional[PriceCube]:
+    """Buka kubus tersimpan secara read-only (memory-mapped). None jika belum ada."""
+    npy_path = cube_dir / f"{CUBE_NAME}.npy"
+    codes_path = cube_dir / f"{CUBE_NAME}.codes.json"
+    if not npy_path.exists() or not codes_path.exists():
+        return None
+
+    codes = json.loads(codes_path.read_text(encoding="utf-8"))
+    values = np.load(npy_path, mmap_mode="r")
+    if values.shape != (len(codes["pasar"]), len(codes["komoditas"]), codes["n_days"]):
+        # .npy dan tabel kode tidak sinkron (sedang ditulis ulang proses lain)
+        return None
+    return PriceCube(values, codes["pasar"], codes["komoditas"], codes["start_date"],
+                     source_mtime=codes.get("source_mtime"), fingerprint=codes.get("fingerprint"))
+
+
+def get_price_cube(df: pd.DataFrame, source_path: str, cube_dir: Path = CUBE_DIR) -> PriceCube:
+    """
+    Ambil kubus dari cache .npy; dibangun ulang jika belum ada, atau isi df
+    (setelah prepare + karantina) berbeda dari saat cache dibuat (frame_fingerprint).
+    Kubus lama tanpa sidik jari selalu dibangun ulang.
+    """
+    cube = load_price_cube(cube_dir)
+    fingerprint = frame_fingerprint(df)
+    if cube is not None and cube.fingerprint == fingerprint:
+        return cube
+
+    save_price_cube(df, source_path, cube_dir, fingerprint)
+    return load_price_cube(cube_dir) or build_price_cube(df)
@@ -0,0 +1,50 @@
+# quantize_artifacts.py
+"""
+Export varian float16 / int8 (TFLite) untuk semua model di folder artifacts/
+lalu tulis laporan selisih akurasi terhadap model float32 asli.
+
+Jalankan:
+    python quantize_artifacts.py
+    python quantize_artifacts.py --window-size 30 --precisions float16 int8
+"""
+
+import argparse
+
+import pandas as pd
+
+from utils import prepare_price_dataframe
+from models_lstm import (
+    ARTIFACT_DIR,
+    export_quantized_artifacts,
+    list_artifacts,
+    quantization_report,
+)
+
+DATA_PATH = "harga_pasar_2024_2025.csv"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kuantisasi model LSTM ke float16 / int8.")
+    parser.add_argument("--window-size", type=int, default=30)
+    parser.add_argument("--precisions", nargs="+", default=["float16", "int8"],
+                        choices=["float16", "int8"])
+    parser.add_argument("--data", default=DATA_PATH)
+    args = parser.parse_args()
+
+    for pasar, komoditas in list_artifacts(args.window_size):
+        paths = export_quantized_artifacts(pasar, komoditas, args.window_size, args.precisions)
+        print(f"[quantize] {pasar} - {komoditas}: {paths}")
+
+    df = prepare_price_dataframe(pd.read_csv(args.data))
+    report = quantization_report(df, args.window_size, args.precisions)
+    report_path = ARTIFACT_DIR / f"quantization_report_WS{args.window_size}.csv"
+    report.to_csv(report_path, index=False)
+
+    if not report.empty:
+        summary = report.groupby("precision")[["size_kb", "delta_mae", "max_abs_diff"]].mean()
+        print(summary.round(2).to_string())
+    print(f"[quantize] Laporan ditulis ke {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# scenarios.py
+"""
+Simulasi "what-if" kejutan harga, mis. "bagaimana jika cabe rawit naik 20% besok?".
+
+Setiap skenario = harga besok dipaksa last_actual x (1 + shock), lalu model melanjutkan
+prediksi dari window yang sudah memuat harga kejutan itu. Semua skenario (plus baseline
+tanpa kejutan) dijalankan sebagai SATU rollout batch (forecast_lstm_batch), jadi sweep
+20 skenario biayanya kira-kira sama dengan satu forecast.
+
+Dipakai di app.py dengan:
+    from scenarios import simulate_price_shocks
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from models_lstm import _ensure_datetime, _to_daily, forecast_lstm_batch
+
+DEFAULT_SHOCKS = (-0.20, -0.10, 0.10, 0.20)
+BASELINE = "Baseline"
+
+
+def shock_label(shock: float) -> str:
+    return f"{shock * 100:+.0f}%"
+
+
+def simulate_price_shocks(
+    model,
+    scaler,
+    df_sub: pd.DataFrame,
+    shocks=DEFAULT_SHOCKS,
+    n_days: int = 30,
+    window_size: int = 30,
+    fill: Optional[str] = "ffill",
+) -> pd.DataFrame:
+    """
+    Jalankan grid skenario kejutan harga untuk satu (pasar, komoditas).
+
+    shocks : iterable fraksi perubahan harga besok (0.2 = naik 20%, -0.1 = turun 10%)
+    fill   : kalender saat model dilatih (models_lstm.artifact_fill(meta))
+
+    Return DataFrame lebar:
+        tanggal | Baseline | -20% | -10% | +10% | +20% ...
+    Baris pertama (besok) untuk skenario = harga kejutan itu sendiri.
+    """
+    shocks = [float(s) for s in shocks]
+    if model is None or scaler is None or df_sub is None or df_sub.empty:
+        return pd.DataFrame(columns=["tanggal", BASELINE] + [shock_label(s) for s in shocks])
+
+    df_sub = _to_daily(_ensure_datetime(df_sub, "tanggal").dropna(subset=["harga"]), fill)
+    values = df_sub["harga"].to_numpy(dtype=np.float64)
+    if len(values) < window_size:
+        print("[simulate_price_shocks] Data historis kurang dari window_size.")
+        return pd.DataFrame(columns=["tanggal", BASELINE] + [shock_label(s) for s in shocks])
+
+    last_window = values[-window_size:]
+    shocked_prices = values[-1] * (1.0 + np.asarray(shocks))
+
+    # Baris 0: baseline (window asli). Baris 1..S: window bergeser 1 hari dengan harga kejutan.
+    windows = np.empty((len(shocks) + 1, window_size))
+    windows[0] = last_window
+    windows[1:, :-1] = last_window[1:]
+    windows[1:, -1] = shocked_prices
+
+    preds = forecast_lstm_batch(model, scaler, windows, n_days)
+
+    last_date = df_sub["tanggal"].max()
+    result = pd.DataFrame({
+        "tanggal": pd.date_range(start=last_date + pd.Timedelta(days=1), periods=n_days, freq="D"),
+        BASELINE: preds[0],
+    })
+    for i, shock in enumerate(shocks, start=1):
+        # Hari ke-1 = harga kejutan, hari 2..n = lanjutan prediksi dari window kejutan
+        result[shock_label(shock)] = np.concatenate([[shocked_prices[i - 1]], preds[i, :n_days - 1]])
+    return result
+
+
+def scenario_summary(df_scen: pd.DataFrame, horizon: int = 7) -> pd.DataFrame:
+    """Ringkasan per skenario: rata-rata & harga hari ke-h, selisih terhadap baseline."""
+    h = min(horizon, len(df_scen))
+    head = df_scen.drop(columns=["tanggal"]).head(h)
+    summary = pd.DataFrame({
+        f"Rata-rata {h} hari (Rp)": head.mean(),
+        f"Hari ke-{h} (Rp)": head.iloc[-1],
+    })
+    baseline_mean = summary.loc[BASELINE, f"Rata-rata {h} hari (Rp)"]
+    summary["Selisih vs baseline (%)"] = (summary[f"Rata-rata {h} hari (Rp)"] / baseline_mean - 1) * 100
+    return summary.rename_axis("Skenario").reset_index()
@@ -0,0 +1,206 @@
+# train_job.py
+"""
+Job retraining massal yang tahan crash dan bisa dilanjutkan.
+
+- Ledger job (training/<job>/ledger.json) mencatat status setiap pasangan:
+  pending -> running -> done / skipped / failed. Ditulis atomik setiap perubahan.
+- Setiap pasangan dilatih dengan checkpoint per epoch (train_lstm_for(checkpoint_dir=...)),
+  jadi pasangan yang sedang berjalan saat proses mati dilanjutkan dari epoch terakhirnya.
+- Artefak dipublikasikan sebagai satu set lewat save_artifacts (folder versi + pointer
+  yang dialihkan atomik); checkpoint dihapus setelah pasangan tercatat 'done'.
+  Varian .tflite dan model_store lama tidak dipakai untuk pasangan yang dilatih ulang
+  sampai quantize_artifacts.py / model_store.py export dijalankan lagi.
+
+Menjalankan ulang perintah yang sama dengan --job yang sama akan melewati pasangan
+yang sudah selesai dan mencoba ulang pasangan yang gagal.
+
+Jalankan:
+    python train_job.py --job retrain_mingguan
+    python train_job.py --job retrain_drift --only-drifting
+    python train_job.py --job retrain_mingguan --status
+    python train_job.py --job retrain_cepat --batch-size 128 --intra-threads 8
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from data_quality import split_quarantine
+from models_lstm import (
+    CKPT_STATE, MODEL_FILL_POLICIES, _artifact_base, configure_cpu_threads, save_artifacts, train_lstm_for,
+)
+from utils import prepare_price_dataframe
+
+DATA_PATH = "harga_pasar_2024_2025.csv"
+JOB_DIR = Path("training")
+DRIFT_REPORT = Path("monitoring") / "drifting_pairs.csv"
+LEDGER_NAME = "ledger.json"
+
+
+def _ledger_path(job: str) -> Path:
+    return JOB_DIR / job / LEDGER_NAME
+
+
+def _checkpoint_dir(job: str, base: str) -> Path:
+    return JOB_DIR / job / "checkpoints" / base
+
+
+def _save_ledger(ledger: dict):
+    path = _ledger_path(ledger["job"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(ledger, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def load_ledger(job: str):
+    path = _ledger_path(job)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def create_ledger(job: str, pairs, window_size: int = 30, epochs: int = 30, fill: str = "ffill",
+                  batch_size: int = 64) -> dict:
+    """Ledger baru: semua pasangan 'pending'. Parameter training dikunci di ledger."""
+    ledger = {
+        "job": job,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "window_size": window_size,
+        "epochs": epochs,
+        "fill": fill,
+        "batch_size": batch_size,
+        "pairs": {
+            _artifact_base(pasar, komoditas, window_size): {
+                "pasar": pasar,
+                "komoditas": komoditas,
+                "status": "pending",
+            }
+            for pasar, komoditas in pairs
+        },
+    }
+    _save_ledger(ledger)
+    return ledger
+
+
+def drifting_pair_list(report_path: Path = DRIFT_REPORT):
+    """Pasangan yang ditandai drift oleh drift_monitor.py."""
+    if not report_path.exists():
+        raise FileNotFoundError(f"{report_path} belum ada; jalankan drift_monitor.py dulu.")
+    report = pd.read_csv(report_path)
+    report = report[report["drifting"].astype(bool)]
+    return list(zip(report["pasar"], report["komoditas"]))
+
+
+def run_job(df: pd.DataFrame, ledger: dict) -> dict:
+    """
+    Latih semua pasangan yang belum 'done'/'skipped'. Ledger diperbarui (atomik) sebelum
+    dan sesudah setiap pasangan, jadi run bisa dihentikan kapan saja lalu dilanjutkan.
+    """
+    job, ws, epochs, fill = ledger["job"], ledger["window_size"], ledger["epochs"], ledger["fill"]
+    batch_size = ledger.get("batch_size", 16)
+
+    for base, entry in ledger["pairs"].items():
+        if entry["status"] in ("done", "skipped"):
+            continue
+        pasar, komoditas = entry["pasar"], entry["komoditas"]
+        ckpt_dir = _checkpoint_dir(job, base)
+        resumed = (ckpt_dir / CKPT_STATE).exists()
+        print(f"[train_job] {pasar} - {komoditas}" + (" (lanjut dari checkpoint)" if resumed else ""))
+
+        entry.update(status="running", started_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+        entry.pop("error", None)
+        _save_ledger(ledger)
+
+        try:
+            model, scaler, df_sub, history, (mae, rmse) = train_lstm_for(
+                df, komoditas, pasar, window_size=ws, epochs=epochs, fill=fill,
+                checkpoint_dir=ckpt_dir, batch_size=batch_size,
+            )
+            if model is None:
+                entry.update(status="skipped", reason="data terlalu sedikit")
+            else:
+                save_artifacts(model, scaler, {
+                    "pasar": pasar,
+                    "komoditas": komoditas,
+                    "window_size": ws,
+                    "epochs": epochs,
+                    "batch_size": batch_size,
+                    "fill": fill,
+                    "mae": float(mae),
+                    "rmse": float(rmse),
+                    "n_data": int(len(df_sub)),
+                    "last_date": str(df_sub["tanggal"].max().date()),
+                }, pasar, komoditas, ws)
+                entry.update(status="done", mae=float(mae), rmse=float(rmse))
+        except Exception as e:
+            entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+            print(f"[train_job] Gagal {pasar} - {komoditas}: {entry['error']}")
+        entry["finished_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        _save_ledger(ledger)
+
+        if entry["status"] != "failed":
+            shutil.rmtree(ckpt_dir, ignore_errors=True)
+
+    return ledger
+
+
+def ledger_summary(ledger: dict) -> pd.DataFrame:
+    rows = [{"base": base, **entry} for base, entry in ledger["pairs"].items()]
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retraining massal dengan checkpoint & ledger job.")
+    parser.add_argument("--job", required=True, help="nama job (folder training/<job>/)")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--window-size", type=int, default=30)
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--fill", default="ffill", choices=list(MODEL_FILL_POLICIES))
+    parser.add_argument("--batch-size", type=int, default=64,
+                        help="ukuran batch (learning rate diskalakan linear terhadap batch 16)")
+    parser.add_argument("--intra-threads", type=int, default=os.cpu_count(),
+                        help="thread intra-op TensorFlow (default: jumlah CPU)")
+    parser.add_argument("--inter-threads", type=int, default=2, help="thread inter-op TensorFlow")
+    parser.add_argument("--only-drifting", action="store_true",
+                        help="hanya pasangan drift dari monitoring/drifting_pairs.csv")
+    parser.add_argument("--status", action="store_true", help="tampilkan status ledger lalu keluar")
+    args = parser.parse_args()
+
+    ledger = load_ledger(args.job)
+    if args.status:
+        if ledger is None:
+            print(f"[train_job] Job '{args.job}' belum ada.")
+        else:
+            print(ledger_summary(ledger)["status"].value_counts().to_string())
+        return
+
+    configure_cpu_threads(args.intra_threads, args.inter_threads)
+    df, _ = split_quarantine(prepare_price_dataframe(pd.read_csv(args.data)))
+    if ledger is None:
+        if args.only_drifting:
+            pairs = drifting_pair_list()
+        else:
+            pairs = df[["pasar", "komoditas"]].drop_duplicates().itertuples(index=False, name=None)
+        ledger = create_ledger(args.job, sorted(pairs), args.window_size, args.epochs, args.fill,
+                               args.batch_size)
+        print(f"[train_job] Job baru '{args.job}': {len(ledger['pairs'])} pasangan.")
+    else:
+        # Parameter training diambil dari ledger agar hasil lanjutan konsisten
+        print(f"[train_job] Melanjutkan job '{args.job}' (window_size={ledger['window_size']}, "
+              f"epochs={ledger['epochs']}, fill={ledger['fill']}, batch_size={ledger.get('batch_size', 16)}).")
+
+    t0 = time.perf_counter()
+    ledger = run_job(df, ledger)
+    counts = ledger_summary(ledger)["status"].value_counts()
+    print(counts.to_string())
+    print(f"[train_job] Selesai dalam {time.perf_counter() - t0:.1f} s; ledger: {_ledger_path(args.job)}")
+
+
+if __name__ == "__main__":
+    main()
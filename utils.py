@@ -12,6 +12,7 @@ Dipakai di app.py dengan:
         format_rupiah,
         categorize_commodity,
         get_category_color,
+        align_daily_calendar,
     )
 """
 
@@ -19,6 +20,18 @@ from typing import Optional
 import pandas as pd
 
 
+# Skema ringkas frame harga hasil prepare_price_dataframe:
+# komoditas/pasar jadi categorical (kode int8 + tabel nama, bukan string per baris),
+# harga float32, tanggal datetime64 pada resolusi hari.
+PRICE_COLUMNS = ["tanggal", "komoditas", "pasar", "harga"]
+PRICE_SCHEMA = {
+    "tanggal": "datetime64[ns]",
+    "komoditas": "category",
+    "pasar": "category",
+    "harga": "float32",
+}
+
+
 # ---------------------------------------------------------
 # 1. Pembersihan & standarisasi komoditas / pasar
 # ---------------------------------------------------------
@@ -89,9 +102,10 @@ def prepare_price_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     - Uppercase & standarisasi nama komoditas & pasar
     - Drop baris tanpa tanggal / harga
     - Sort berdasarkan tanggal, komoditas, pasar
+    - Menerapkan PRICE_SCHEMA (categorical, float32, tanggal per hari)
     """
     if df is None or df.empty:
-        return pd.DataFrame(columns=["tanggal", "komoditas", "pasar", "harga"])
+        return pd.DataFrame(columns=PRICE_COLUMNS).astype(PRICE_SCHEMA)
 
     # Normalisasi nama kolom ke lowercase
     df = df.copy()
@@ -121,7 +135,7 @@ def prepare_price_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     missing = required - set(df.columns)
     if missing:
         # Kalau ada kolom wajib yang hilang, kembalikan df kosong
-        return pd.DataFrame(columns=["tanggal", "komoditas", "pasar", "harga"])
+        return pd.DataFrame(columns=PRICE_COLUMNS).astype(PRICE_SCHEMA)
 
     # Konversi tanggal
     df["tanggal"] = pd.to_datetime(df["tanggal"], errors="coerce")
@@ -148,10 +162,12 @@ def prepare_price_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     # Drop baris tidak valid
     df = df.dropna(subset=["tanggal", "harga"])
 
-    # Sort
-    df = df.sort_values(["tanggal", "komoditas", "pasar"]).reset_index(drop=True)
+    # Skema ringkas (lihat PRICE_SCHEMA), tanggal dibulatkan ke hari
+    df["tanggal"] = df["tanggal"].dt.normalize()
+    df = df[PRICE_COLUMNS].astype(PRICE_SCHEMA)
 
-    return df[["tanggal", "komoditas", "pasar", "harga"]]
+    # Sort
+    return df.sort_values(["tanggal", "komoditas", "pasar"]).reset_index(drop=True)
 
 
 # ---------------------------------------------------------
@@ -234,7 +250,18 @@ def get_category_color(category_or_komoditas: str) -> str:
 
     return color_map.get(cat, "#3949AB")
 
-def kebijakan_saran(df_hist, df_pred, horizon_analisis: int = 7) -> str:
+def kebijakan_saran(
+    df_hist,
+    df_pred,
+    horizon_analisis: int = 7,
+    hist_volatility: Optional[float] = None,
+) -> str:
+    """
+    Menyusun ringkasan prediksi + saran kebijakan (markdown).
+    hist_volatility (opsional, %/hari, mis. dari aggregates.latest_volatility):
+    jika diberikan, klasifikasi volatilitas memakai volatilitas historis ini,
+    bukan hanya volatilitas deret prediksi.
+    """
     import numpy as np
 
     if df_hist is None or df_hist.empty or df_pred is None or df_pred.empty:
@@ -243,8 +270,8 @@ def kebijakan_saran(df_hist, df_pred, horizon_analisis: int = 7) -> str:
             "belum dapat disusun saran kebijakan yang spesifik."
         )
 
-    df_hist = df_hist.sort_values("tanggal").copy()
-    df_pred = df_pred.sort_values("tanggal").copy()
+    df_hist = df_hist.sort_values("tanggal")
+    df_pred = df_pred.sort_values("tanggal")
 
     komoditas = df_hist["komoditas"].iloc[-1] if "komoditas" in df_hist.columns else "-"
     pasar = df_hist["pasar"].iloc[-1] if "pasar" in df_hist.columns else "-"
@@ -273,6 +300,11 @@ def kebijakan_saran(df_hist, df_pred, horizon_analisis: int = 7) -> str:
     else:
         volatility = 0.0
 
+    vol_label = "Volatilitas"
+    if hist_volatility is not None:
+        volatility = float(hist_volatility)
+        vol_label = "Volatilitas historis"
+
     # ===== KLASIFIKASI TREN (lebih halus) =====
     # gunakan gabungan mean + last + slope
     score = 0.0
@@ -311,7 +343,7 @@ def kebijakan_saran(df_hist, df_pred, horizon_analisis: int = 7) -> str:
     teks.append(f"- Harga aktual terakhir: **{fmt_rp(last_actual)}**")
     teks.append(f"- Rata-rata prediksi {h} hari: **{fmt_rp(mean_pred)}** ({change_mean:+.1f}%)")
     teks.append(f"- Prediksi hari ke-{h}: **{fmt_rp(last_pred_h)}** ({change_last:+.1f}%)")
-    teks.append(f"- Tren: **{tren}** | Volatilitas: **{vol_text}** (±{volatility:.1f}%/hari)")
+    teks.append(f"- Tren: **{tren}** | {vol_label}: **{vol_text}** (±{volatility:.1f}%/hari)")
     teks.append("")
 
     teks.append("**Implikasi Kebijakan yang Disarankan:**")
@@ -346,3 +378,68 @@ def kebijakan_saran(df_hist, df_pred, horizon_analisis: int = 7) -> str:
 
     return "\n".join(teks)
 
+
+
+# ---------------------------------------------------------
+# 3. Kalender harian (hari libur / data kosong)
+# ---------------------------------------------------------
+
+FILL_POLICIES = ("ffill", "linear", "none")
+
+
+def align_daily_calendar(
+    df: pd.DataFrame,
+    fill: str = "ffill",
+    limit: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Menyelaraskan SEMUA deret (pasar, komoditas) ke kalender harian kontinu
+    dalam satu operasi (pivot -> reindex -> fill -> stack), tanpa loop per deret.
+
+    Setiap deret direntang dari tanggal observasi pertama s.d. terakhirnya sendiri;
+    hari yang tidak ada datanya (libur, tidak tercatat) diisi sesuai `fill`:
+        - "ffill"  : pakai harga hari sebelumnya
+        - "linear" : interpolasi linear antar dua observasi
+        - "none"   : dibiarkan NaN
+    `limit` membatasi jumlah hari berturut-turut yang boleh diisi.
+
+    Output kolom: ['tanggal', 'komoditas', 'pasar', 'harga', 'is_gap'],
+    dengan is_gap=True untuk hari yang bukan observasi asli.
+    """
+    if fill not in FILL_POLICIES:
+        raise ValueError(f"fill harus salah satu dari {FILL_POLICIES}, bukan {fill!r}")
+
+    cols = ["tanggal", "komoditas", "pasar", "harga", "is_gap"]
+    if df is None or df.empty:
+        return pd.DataFrame(columns=cols)
+
+    wide = df.pivot_table(
+        index="tanggal",
+        columns=["pasar", "komoditas"],
+        values="harga",
+        aggfunc="last",
+        observed=True,
+    )
+    calendar = pd.date_range(wide.index.min(), wide.index.max(), freq="D", name="tanggal")
+    wide = wide.reindex(calendar)
+
+    observed = wide.notna()
+    # Rentang hidup tiap deret: setelah observasi pertama & sebelum observasi terakhir
+    inside = observed.cumsum().gt(0) & observed[::-1].cumsum()[::-1].gt(0)
+
+    if fill == "ffill":
+        filled = wide.ffill(limit=limit)
+    elif fill == "linear":
+        filled = wide.interpolate(method="linear", limit=limit, limit_area="inside")
+    else:
+        filled = wide
+
+    long = pd.DataFrame({
+        "harga": filled.where(inside).stack(["pasar", "komoditas"], future_stack=True),
+        "is_gap": (~observed).stack(["pasar", "komoditas"], future_stack=True),
+        "inside": inside.stack(["pasar", "komoditas"], future_stack=True),
+    })
+    long = long[long["inside"]].reset_index()
+
+    long = long.sort_values(["tanggal", "komoditas", "pasar"]).reset_index(drop=True)
+    return long[cols]